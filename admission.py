@@ -0,0 +1,146 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+class Admission:
+    """准入凭据：请求结束时释放预留的模型调用数，可作为上下文管理器使用"""
+
+    def __init__(self, controller: 'AdmissionController', calls: int, predicted: float, retry_after: int,
+                 admitted: bool, blocking: bool = False):
+        self.controller = controller
+        self.calls = calls
+        self.blocking = blocking
+        self.predicted = predicted
+        self.retry_after = retry_after
+        self.admitted = admitted
+        self._released = not admitted
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.controller._release(self.calls, self.blocking)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    """
+    准入控制类
+
+    按最近模型调用耗时的指数加权平均（EWMA）和已接受请求预留的模型调用数估算排队时间：
+    预留调用数超过上游并发容量的部分需要排队，每 capacity 个调用约耗时一个平均调用时间。
+    预计完成时间超过客户端截止时间，或积压调用数超过上限时拒绝请求。
+
+    任务队列模式下模型调用在工作进程中，改为按队列中排在前面的任务数、处理中的任务数
+    和工作进程上报的平均任务耗时估算，积压上限为整个队列的 max_queued_tasks。
+    其余统计只覆盖当前进程，capacity 和 max_pending_calls 为单个进程的份额。
+
+    同步请求在等待翻译期间占用一个请求处理线程，同时接受的同步请求数不超过 max_requests，
+    超出时直接拒绝，为 /health 等轻量接口保留空闲线程。
+    """
+
+    def __init__(self, capacity: int = 16, max_pending_calls: int = 200, initial_latency: float = 20.0,
+                 alpha: float = 0.2, max_requests: int = 12, max_queued_tasks: int = 1000):
+        self.capacity = max(1, capacity)
+        self.max_pending_calls = max_pending_calls
+        self.max_requests = max(1, max_requests)
+        self.max_queued_tasks = max_queued_tasks
+        self.alpha = alpha
+        self._latency = initial_latency
+        self._samples = 0
+        self._in_flight = 0
+        self._reserved = 0
+        self._requests = 0
+        self._stats = {'admitted': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        """统计一次模型调用的并发数和耗时"""
+        with self._lock:
+            self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._in_flight -= 1
+                self._samples += 1
+                self._latency += self.alpha * (elapsed - self._latency)
+
+    def admit(self, calls: int, depth: int, deadline: float,
+              queue_load: Optional[Dict[str, Any]] = None, blocking: bool = True) -> Admission:
+        """
+        判断是否接受请求，接受时预留调用数
+
+        Args:
+            calls: 请求需要的模型调用数（任务队列模式下为任务数）
+            depth: 请求内串行的模型调用数（并行翻译为1，逐语言顺序翻译为语言数）
+            deadline: 客户端可等待的秒数
+            queue_load: 任务队列模式下的队列负载，见 WorkQueue.load
+            blocking: 请求是否在请求处理线程中等待翻译完成（回调模式为 False）
+
+        Returns:
+            准入凭据，admitted 为 False 时 retry_after 为建议的重试等待秒数
+        """
+        with self._lock:
+            if queue_load is None:
+                latency = self._latency
+                # 未经准入的调用（如校验重译、对冲）也占用上游容量
+                pending = max(self._reserved, self._in_flight)
+                excess = max(0, pending + calls - self.capacity)
+                concurrency = self.capacity
+                max_pending = self.max_pending_calls
+            else:
+                # 有排队任务时工作进程已满载，处理中的任务数即为并发处理能力
+                latency = queue_load.get('latency') or self._latency
+                pending = queue_load['pending']
+                excess = pending
+                concurrency = max(queue_load['reserved'], 1)
+                max_pending = self.max_queued_tasks
+            wait = latency * excess / concurrency
+            predicted = wait + latency * max(depth, 1)
+            # 缓存全部命中的请求很快结束，不占用同步请求名额
+            blocking = blocking and calls > 0
+            admitted = calls == 0 or (predicted <= deadline and pending + calls <= max_pending and
+                                      (not blocking or self._requests < self.max_requests))
+            if admitted:
+                self._reserved += calls
+                self._requests += 1 if blocking else 0
+                self._stats['admitted'] += 1
+            else:
+                self._stats['rejected'] += 1
+        # 建议等到当前积压消化到可以开始处理时再重试
+        retry_after = max(1, math.ceil(latency * max(1, excess) / concurrency))
+        return Admission(self, calls, predicted, retry_after, admitted, blocking)
+
+    def _release(self, calls: int, blocking: bool = False):
+        with self._lock:
+            self._reserved = max(0, self._reserved - calls)
+            if blocking:
+                self._requests = max(0, self._requests - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """准入统计：当前并发调用数、预留调用数、进行中的同步请求数、平均调用耗时和接受/拒绝次数"""
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'max_requests': self.max_requests,
+                'blocking_requests': self._requests,
+                'in_flight_calls': self._in_flight,
+                'reserved_calls': self._reserved,
+                'latency_ewma': round(self._latency, 3),
+                'latency_samples': self._samples,
+                'estimated_wait': round(self._latency * max(0, max(self._reserved, self._in_flight) -
+                                                            self.capacity) / self.capacity, 3),
+                'admitted': self._stats['admitted'],
+                'rejected': self._stats['rejected']
+            }
@@ -1,131 +1,700 @@
-from flask import Flask, request, jsonify
-import openai
+from flask import Flask, Blueprint, request, jsonify, g, current_app
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Callable, Tuple
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
 from collections import defaultdict
-import json
-import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import sys
-import io
+import threading
+import time
+import uuid
 
-# 设置标准输出为 UTF-8
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-# 设置错误输出
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 # 加载环境变量
 load_dotenv()
 
-from config import Config, LanguageConfig
+from config import Config
+from translation_service import TranslationService, TARGET_LANGUAGES, language_graph
+from webhook import WebhookDispatcher, WebhookSequence
+from store import TranslationStore, source_hash
+import profiling
+from work_queue import create_work_queue
+from lazy import Lazy
 
-# 配置日志
-logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+# 回调任务积压已满时建议客户端重试的间隔（秒）
+CALLBACK_RETRY_AFTER = 5
 
-# 获取语言配置
-TARGET_LANGUAGES = LanguageConfig.get_target_languages()
+bp = Blueprint('translation', __name__)
 
 
-class TranslationService:
-    """翻译服务类"""
+class TranslationComponents:
+    """
+    应用使用的各组件，由 create_app() 创建并保存在 app.extensions['translation']，路由中通过 components() 获取
 
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
-
-    def translate_content(self, news_id: str, title: str, description: str, content: str, target_language: str) -> Dict[
-        str, Any]:
-        """
-        翻译内容到指定目标语言
-        
-        Args:
-            news_id: 新闻ID
-            title: 标题
-            description: 描述
-            content: 正文
-            target_language: 目标语言代码
-            
-        Returns:
-            翻译结果字典
-        """
-        if target_language not in TARGET_LANGUAGES:
-            raise ValueError(f"不支持的目标语言: {target_language}")
+    线程池、模型客户端和数据库连接都在首次使用时于当前进程内创建，
+    gunicorn preload_app 时 master 进程加载应用后 fork 出的工作进程不会复用 master 的线程和连接。
+    """
 
-        language_config = TARGET_LANGUAGES[target_language]
-        prompt = language_config['prompt_template'].format(
-            title=title,
-            description=description,
-            content=content
+    def __init__(self):
+        self.translation_service = TranslationService()
+        # 回调模式下的后台翻译任务线程池与回调推送器，排队和执行中的任务数不超过 CALLBACK_MAX_PENDING
+        self.callback_executor = Lazy(lambda: ThreadPoolExecutor(max_workers=Config.CALLBACK_JOB_WORKERS,
+                                                                 thread_name_prefix='callback-job'))
+        self.callback_slots = threading.BoundedSemaphore(Config.CALLBACK_MAX_PENDING)
+        self.webhook_dispatcher = WebhookDispatcher(
+            secret=Config.WEBHOOK_SECRET,
+            max_workers=Config.WEBHOOK_WORKERS,
+            max_pending=Config.WEBHOOK_MAX_PENDING,
+            max_retries=Config.WEBHOOK_MAX_RETRIES,
+            retry_backoff=Config.WEBHOOK_RETRY_BACKOFF,
+            timeout=Config.WEBHOOK_TIMEOUT,
+            allowed_hosts=Config.WEBHOOK_ALLOWED_HOSTS
         )
+        # 翻译结果存储
+        self.translation_store = TranslationStore(
+            Config.STORE_PATH,
+            batch_size=Config.STORE_BATCH_SIZE,
+            flush_interval=Config.STORE_FLUSH_INTERVAL
+        ) if Config.STORE_ENABLED else None
+        # 任务队列（开启后 API 进程只入队和汇总结果）
+        self.work_queue = create_work_queue(
+            Config.WORK_QUEUE_URL,
+            max_attempts=Config.WORK_QUEUE_MAX_ATTEMPTS
+        ) if Config.WORK_QUEUE_ENABLED else None
+        # 慢请求采样分析
+        self.sampling_profiler = profiling.SamplingProfiler(
+            interval=Config.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        ) if Config.PROFILE_SLOW_REQUESTS else None
 
-        try:
-            response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=Config.OPENAI_TEMPERATURE,
-                max_tokens=Config.OPENAI_MAX_TOKENS
-            )
 
-            translation_result = response.choices[0].message.content
+def components() -> TranslationComponents:
+    """当前应用的组件（需要在应用上下文中调用）"""
+    return current_app.extensions['translation']
+
+
+def configure_stdio():
+    """直接运行时把标准输出/错误输出设置为 UTF-8（gunicorn 下由启动脚本设置 PYTHONIOENCODING）"""
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+
+def create_app() -> Flask:
+    """
+    创建 Flask 应用
+
+    只构建各组件对象和只读的共享状态（语言配置、提示词模板在导入 translation_service 时生成），
+    不导入 openai、不启动线程、不保持数据库连接，启动很快，也可以在 gunicorn master 进程中预加载。
+    每次调用创建一个独立的应用和一组独立的组件。
+    """
+    # 配置日志
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+
+    flask_app = Flask(__name__)
+    flask_app.extensions['translation'] = TranslationComponents()
+    flask_app.register_blueprint(bp)
+    return flask_app
 
-            # 尝试解析JSON响应
-            import json
-            import re
-            try:
-                match = re.search(r"```json\s*(\{.*?\})\s*```", translation_result, re.DOTALL)
-                parsed_result = json.loads(match.group(1))
-                return {
-                    'news_id': news_id,
-                    'target_language': target_language,
-                    'language_name': language_config['name'],
-                    'language_code': language_config['code'],
-                    'translated_title': parsed_result.get('title', ''),
-                    'translated_description': parsed_result.get('description', ''),
-                    'translated_content': parsed_result.get('content', ''),
-                    'original_title': title,
-                    'original_description': description,
-                    'original_content': content,
-                    'timestamp': datetime.now().isoformat(),
-                    'status': 'success'
-                }
-            except json.JSONDecodeError:
-                # 如果无法解析JSON，返回原始响应
-                return {
-                    'news_id': news_id,
-                    'target_language': target_language,
-                    'language_name': language_config['name'],
-                    'language_code': language_config['code'],
-                    'raw_translation': translation_result,
-                    'original_title': title,
-                    'original_description': description,
-                    'original_content': content,
-                    'timestamp': datetime.now().isoformat(),
-                    'status': 'success_raw'
-                }
 
-        except Exception as e:
-            logger.error(f"翻译失败 - 新闻ID: {news_id}, 目标语言: {target_language}, 错误: {str(e)}")
-            return {
+def run_in_app_context(flask_app: Flask, fn: Callable, *args):
+    """在后台线程中以指定应用的上下文执行，使其中可以通过 components() 获取组件"""
+    with flask_app.app_context():
+        return fn(*args)
+
+
+def record_translation(result: Dict[str, Any]):
+    """保存翻译结果（未启用存储时忽略）"""
+    translation_store = components().translation_store
+    if translation_store is not None:
+        with profiling.span('store'):
+            translation_store.record(result, Config.OPENAI_MODEL)
+
+
+def lookup_cached_translations(news_id: str, title: str, description: str, content: str,
+                               target_languages: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    查询原文和模型都未变化的已保存译文（如 feed_watcher.py 预翻译的结果），命中的语言不再调用模型
+
+    Returns:
+        {目标语言代码: 翻译结果字典}，结果带 cached 标记
+    """
+    translation_store = components().translation_store
+    if translation_store is None or not Config.CACHE_ENABLED:
+        return {}
+    cached = {}
+    with profiling.span('cache'):
+        hash_value = source_hash(title, description, content)
+        for target_language in dict.fromkeys(target_languages):
+            try:
+                row = translation_store.get_cached(news_id, target_language, hash_value, Config.OPENAI_MODEL)
+            except Exception as e:
+                logger.error(f"译文缓存查询失败 - 新闻ID: {news_id}, 目标语言: {target_language}, 错误: {str(e)}")
+                continue
+            if row is None:
+                continue
+            cached[target_language] = {
                 'news_id': news_id,
                 'target_language': target_language,
+                'language_name': TARGET_LANGUAGES[target_language]['name'],
+                'language_code': row['language_code'],
+                'original_title': title,
+                'original_description': description,
+                'original_content': content,
+                'translated_title': row['title'],
+                'translated_description': row['description'],
+                'translated_content': row['content'],
+                'timestamp': row['created_at'],
+                'status': 'success',
+                'cached': True
+            }
+    return cached
+
+
+def request_deadline(data: Optional[Dict[str, Any]]) -> float:
+    """客户端可等待的秒数：X-Deadline-Seconds 请求头或JSON中的 deadline_seconds，未提供时使用默认值"""
+    value = request.headers.get('X-Deadline-Seconds')
+    if value is None and isinstance(data, dict):
+        value = data.get('deadline_seconds')
+    try:
+        return float(value) if value is not None else Config.ADMISSION_DEFAULT_DEADLINE
+    except (TypeError, ValueError):
+        return Config.ADMISSION_DEFAULT_DEADLINE
+
+
+def translation_depth(target_languages: List[str], split_mode: bool = False) -> int:
+    """请求内串行的模型调用数，用于估算完成时间"""
+    if split_mode:
+        return 1
+    if Config.LANGUAGE_DAG_ENABLED:
+        derived = any(parent is not None for parent in language_graph(target_languages).values())
+        return 2 if derived else 1
+    if components().work_queue is not None:
+        return 1
+    return len(dict.fromkeys(target_languages))
+
+
+def admit_request(news_id: str, data: Optional[Dict[str, Any]], calls: int, depth: int, queued: bool = False,
+                  blocking: bool = True, priority: int = 0):
+    """
+    准入控制：预计完成时间超过客户端截止时间、积压过多或同步请求占满处理线程时拒绝请求
+
+    queued 为 True 时请求由任务队列的工作进程翻译，按不低于 priority 的排队任务估算等待时间；
+    blocking 为 False 时（回调模式）请求立即返回，不占用同步请求名额。
+
+    Returns:
+        (准入凭据, 拒绝响应)。接受时凭据在请求结束后释放（with 语句）；未启用准入控制时凭据为空操作
+    """
+    parts = components()
+    admission = parts.translation_service.admission
+    if admission is None:
+        return nullcontext(), None
+    deadline = request_deadline(data)
+    queue_load = (parts.work_queue.load(priority=priority, window=Config.ADMISSION_QUEUE_LATENCY_WINDOW)
+                  if queued else None)
+    ticket = admission.admit(calls, depth, deadline, queue_load, blocking)
+    if ticket.admitted:
+        return ticket, None
+    logger.warning(f"服务繁忙，拒绝请求 - 新闻ID: {news_id}, 预计耗时: {ticket.predicted:.1f}s, 截止时间: {deadline:.1f}s")
+    return None, (jsonify({
+        'news_id': news_id,
+        'status': 'error',
+        'timestamp': datetime.now().isoformat(),
+        'error': '服务繁忙，请稍后重试',
+        'predicted_seconds': round(ticket.predicted, 1),
+        'deadline_seconds': deadline,
+        'retry_after': ticket.retry_after
+    }), 503, {'Retry-After': str(ticket.retry_after)})
+
+
+@bp.before_app_request
+def start_request_profiling():
+    """按需开启请求耗时统计和慢请求采样"""
+    g.timer_token = None
+    g.profile_token = None
+    sampling_profiler = components().sampling_profiler
+    if sampling_profiler is not None:
+        g.profile_token = sampling_profiler.start_request(request.path.strip('/') or 'root')
+
+    timing_requested = Config.TIMING_ENABLED or request.headers.get('X-Timing') == '1'
+    if not timing_requested and not request.is_json:
+        return
+    # 请求体中的 timing 标记要解析后才知道，先开始统计，解析后未要求时再丢弃
+    token = profiling.start_timer()
+    with profiling.span('parse'):
+        data = request.get_json(silent=True)
+    if timing_requested or (isinstance(data, dict) and bool(data.get('timing'))):
+        g.timer_token = token
+    else:
+        profiling.stop_timer(token)
+
+
+@bp.after_app_request
+def attach_request_timing(response):
+    """把耗时统计写入 Server-Timing 响应头和 JSON 返回的 timing 字段"""
+    timer = profiling.current_timer()
+    if timer is None:
+        return response
+    if response.is_json:
+        payload = response.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload['timing'] = timer.as_dict()
+            response.set_data(current_app.json.dumps(payload))
+    response.headers['Server-Timing'] = timer.server_timing()
+    return response
+
+
+@bp.teardown_app_request
+def finish_request_profiling(exc=None):
+    """结束耗时统计，慢请求写出采样结果"""
+    if g.get('timer_token') is not None:
+        profiling.stop_timer(g.timer_token)
+    if g.get('profile_token') is not None:
+        profile = components().sampling_profiler.finish_request(g.profile_token)
+        elapsed_ms = (time.perf_counter() - profile.started) * 1000
+        if elapsed_ms >= Config.PROFILE_SLOW_THRESHOLD_MS and profile.samples:
+            try:
+                path = profile.dump(Config.PROFILE_DIR)
+                logger.warning(f"慢请求 {request.path} 耗时 {elapsed_ms:.0f}ms，采样结果: {path}")
+            except Exception as e:
+                logger.error(f"采样结果写入失败: {str(e)}")
+
+
+def queue_payload(news_id: str, title: str, description: str, content: str, target_language: str,
+                  **options) -> Dict[str, Any]:
+    """
+    单语言翻译任务的内容
+
+    options 为工作进程的处理选项：kind='headline' 只翻译标题和描述，store=False 时工作进程不保存结果
+    """
+    payload = {
+        'news_id': news_id,
+        'title': title,
+        'description': description,
+        'content': content,
+        'target_language': target_language
+    }
+    payload.update(options)
+    return payload
+
+
+def enqueue_tasks(job_id: str, payloads: Dict[Any, Dict[str, Any]], parents: Optional[Dict[Any, Any]] = None,
+                  priority: int = 0) -> Dict[Any, str]:
+    """
+    把一组任务提交到任务队列
+
+    Args:
+        payloads: {键: 任务内容}
+        parents: {键: 依赖的键或 None}（可选），未提供时任务互不依赖
+
+    Returns:
+        {键: 任务ID}
+    """
+    with profiling.span('enqueue'):
+        return components().work_queue.enqueue_graph(job_id, payloads, parents or dict.fromkeys(payloads),
+                                                     priority=priority)
+
+
+def collect_queue_results(job_id: str, task_ids: Dict[Any, str], payloads: Dict[Any, Dict[str, Any]],
+                          on_finished: Optional[Callable[[Any, Dict[str, Any]], None]] = None
+                          ) -> Dict[Any, Dict[str, Any]]:
+    """
+    等待工作进程返回结果，超时后取消作业下仍在排队的任务
+
+    超时时已被领取的任务由工作进程照常完成，排队中的任务不再被领取，避免请求已返回后继续消耗模型调用。
+
+    Args:
+        task_ids: enqueue_tasks 的返回值 {键: 任务ID}
+        payloads: {键: 任务内容}，用于生成失败结果
+        on_finished: 任务结束回调（可选），参数为 (键, 结果字典)，按结束顺序调用，超时的任务最后以失败结果调用
+
+    Returns:
+        {键: 结果字典}，超时、取消或进入死信的任务返回失败结果
+    """
+    keys = {task_id: key for key, task_id in task_ids.items()}
+    results = {}
+
+    def collect(task_id: str, item: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        key = keys[task_id]
+        if item is not None and item['status'] == 'done':
+            results[key] = item['result']
+        else:
+            target_language = payloads[key]['target_language']
+            language_config = TARGET_LANGUAGES[target_language]
+            results[key] = {
+                'news_id': payloads[key]['news_id'],
+                'target_language': target_language,
                 'language_name': language_config['name'],
                 'language_code': language_config['code'],
-                'error': str(e),
+                'error': item['error'] if item is not None else '等待翻译结果超时',
                 'timestamp': datetime.now().isoformat(),
                 'status': 'error'
             }
+        return results[key]
+
+    def finished_callback(task_id: str, item: Optional[Dict[str, Any]]):
+        result = collect(task_id, item)
+        if on_finished:
+            on_finished(keys[task_id], result)
+
+    work_queue = components().work_queue
+    with profiling.span('queue_wait'):
+        finished = work_queue.wait_for_job(job_id, list(keys), timeout=Config.WORK_QUEUE_RESULT_TIMEOUT,
+                                           on_finished=finished_callback)
+
+    timed_out = [task_id for task_id in keys if task_id not in finished]
+    if timed_out:
+        cancelled = work_queue.cancel_job(job_id, '等待翻译结果超时，任务已取消')
+        logger.warning(f"等待翻译结果超时 - 作业ID: {job_id}, 未完成任务: {len(timed_out)}, 已取消排队任务: {cancelled}")
+        for task_id in timed_out:
+            finished_callback(task_id, None)
+    return results
+
+
+def translate_via_queue(news_id: str, title: str, description: str, content: str,
+                        target_languages: List[str], use_graph: bool = None,
+                        on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                        ) -> Dict[str, Dict[str, Any]]:
+    """
+    把每种语言作为一个任务提交到任务队列，并等待工作进程返回结果
+
+    工作进程已完成译文校验和结果保存。开启语言依赖图时，派生语言的任务在父语言任务结束后
+    才会被领取，由工作进程基于父语言译文派生。超时或进入死信的语言返回失败结果。
+
+    Args:
+        use_graph: 是否按语言依赖图提交，未指定时按 LANGUAGE_DAG_ENABLED
+        on_result: 单语言翻译完成回调（可选），参数为 (目标语言代码, 翻译结果字典)
+
+    Returns:
+        {目标语言代码: 翻译结果字典}
+    """
+    if use_graph is None:
+        use_graph = Config.LANGUAGE_DAG_ENABLED
+    parents = language_graph(target_languages) if use_graph else dict.fromkeys(target_languages)
+    payloads = {
+        target_language: queue_payload(news_id, title, description, content, target_language)
+        for target_language in parents
+    }
+    job_id = uuid.uuid4().hex
+    task_ids = enqueue_tasks(job_id, payloads, parents)
+    return collect_queue_results(job_id, task_ids, payloads, on_finished=on_result)
+
+
+def translate_headlines_via_queue(news_id: str, title: str, description: str,
+                                  target_languages: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    标题/描述任务以 WORK_QUEUE_HEADLINE_PRIORITY 提交到任务队列，并等待工作进程返回结果
+
+    Returns:
+        {目标语言代码: 翻译结果字典}，不包含正文
+    """
+    payloads = {
+        target_language: queue_payload(news_id, title, description, '', target_language, kind='headline')
+        for target_language in dict.fromkeys(target_languages)
+    }
+    job_id = uuid.uuid4().hex
+    task_ids = enqueue_tasks(job_id, payloads, priority=Config.WORK_QUEUE_HEADLINE_PRIORITY)
+    return collect_queue_results(job_id, task_ids, payloads)
+
+
+def translate_split_via_queue(news_id: str, title: str, description: str, content: str,
+                              target_languages: List[str],
+                              on_headline: Optional[Callable[[Dict[str, Any]], None]] = None
+                              ) -> Dict[str, Dict[str, Any]]:
+    """
+    任务队列模式下的分离模式翻译，与 TranslationService.translate_split 行为一致
+
+    标题/描述任务以 WORK_QUEUE_HEADLINE_PRIORITY 先于正文任务提交，结束后立即回调 on_headline；
+    正文任务由工作进程翻译和校验，不保存，正文完成后用标题任务的结果覆盖对应字段，由调用方保存合并后的结果。
+
+    Returns:
+        {目标语言代码: 翻译结果字典}
+    """
+    job_id = uuid.uuid4().hex
+    headline_payloads = {
+        ('headline', lang): queue_payload(news_id, title, description, '', lang, kind='headline')
+        for lang in target_languages
+    }
+    body_payloads = {
+        ('body', lang): queue_payload(news_id, title, description, content, lang, store=False)
+        for lang in target_languages
+    }
+    task_ids = enqueue_tasks(job_id, headline_payloads, priority=Config.WORK_QUEUE_HEADLINE_PRIORITY)
+    task_ids.update(enqueue_tasks(job_id, body_payloads))
+
+    def on_finished(key: Tuple[str, str], result: Dict[str, Any]):
+        if key[0] == 'headline' and on_headline:
+            try:
+                on_headline(result)
+            except Exception as e:
+                logger.error(f"标题回调失败 - 新闻ID: {news_id}, 错误: {str(e)}")
+
+    finished = collect_queue_results(job_id, task_ids, {**headline_payloads, **body_payloads}, on_finished)
+
+    results = {}
+    for lang in target_languages:
+        result = finished[('body', lang)]
+        headline = finished[('headline', lang)]
+        if result['status'] == 'success' and headline['status'] == 'success':
+            result['translated_title'] = headline['translated_title']
+            result['translated_description'] = headline['translated_description']
+        results[lang] = result
+    return results
+
+
+def run_multi_translation(news_id: str, title: str, description: str, content: str,
+                          target_languages: List[str], split_mode: bool = False,
+                          on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                          on_headline: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          cached: Optional[Dict[str, Dict[str, Any]]] = None
+                          ) -> Tuple[Dict[str, Any], int]:
+    """
+    执行多语言翻译并转换为 /translate/multi 的返回格式
+
+    Args:
+        news_id: 新闻ID
+        title: 标题
+        description: 描述
+        content: 正文
+        target_languages: 目标语言代码列表（调用方已校验）
+        split_mode: 是否使用标题/描述快速通道
+        on_result: 单语言翻译完成回调（可选），参数为 (目标语言代码, 翻译结果字典)
+        on_headline: 分离模式下标题/描述完成回调（可选）
+        cached: 已查询到的缓存译文（可选），未提供时在这里查询
+
+    Returns:
+        (返回数据, HTTP状态码)
+    """
+    translation_service = components().translation_service
+    work_queue = components().work_queue
+    translations = []
+    has_error = False
+    errors = {}
+    validation_errors = {}
+    target_languages = list(dict.fromkeys(target_languages))
+
+    # 已有相同原文的译文时直接返回，只翻译其余语言
+    if cached is None:
+        cached = lookup_cached_translations(news_id, title, description, content, target_languages)
+    if on_result:
+        for target_language, result in cached.items():
+            on_result(target_language, result)
+    pending_languages = [lang for lang in target_languages if lang not in cached]
+
+    if split_mode and work_queue is not None:
+        # 任务队列模式下的分离模式：标题任务以高优先级入队，正文由工作进程翻译和校验，合并后在这里保存
+        results = translate_split_via_queue(news_id, title, description, content, pending_languages,
+                                            on_headline=on_headline)
+        if on_result:
+            for target_language in pending_languages:
+                on_result(target_language, results[target_language])
+    elif split_mode:
+        # 分离模式：标题/描述快速通道 + 正文常规通道
+        results = translation_service.translate_split(
+            news_id=news_id,
+            title=title,
+            description=description,
+            content=content,
+            target_languages=pending_languages,
+            on_headline=on_headline
+        )
+        for target_language in pending_languages:
+            if Config.VALIDATION_ENABLED:
+                results[target_language] = translation_service.validate_and_repair(
+                    results[target_language], title, description, content
+                )
+            if on_result:
+                on_result(target_language, results[target_language])
+    elif work_queue is not None:
+        # 任务队列模式：由工作进程翻译、校验并保存（开启语言依赖图时派生语言同样由工作进程处理）
+        results = translate_via_queue(news_id, title, description, content, pending_languages,
+                                      on_result=on_result)
+    elif Config.LANGUAGE_DAG_ENABLED:
+        # 按语言依赖图并行翻译，派生语言复用父语言校验修复后的译文
+        results = translation_service.translate_graph(
+            news_id=news_id,
+            title=title,
+            description=description,
+            content=content,
+            target_languages=pending_languages,
+            validate=Config.VALIDATION_ENABLED
+        )
+        if on_result:
+            for target_language in pending_languages:
+                on_result(target_language, results[target_language])
+    else:
+        results = {}
+        for target_language in pending_languages:
+            result = translation_service.translate_content(
+                news_id=news_id,
+                title=title,
+                description=description,
+                content=content,
+                target_language=target_language
+            )
+            if Config.VALIDATION_ENABLED:
+                result = translation_service.validate_and_repair(result, title, description, content)
+            results[target_language] = result
+            if on_result:
+                on_result(target_language, result)
+    results.update(cached)
+
+    for target_language in target_languages:
+        result = results[target_language]
+        logger.debug(f"翻译结果 - 新闻ID: {news_id}, 目标语言: {target_language}, 结果: {result}")
+        # 任务队列模式下由工作进程保存，分离模式合并标题后在这里保存
+        if not result.get('cached') and (split_mode or work_queue is None):
+            record_translation(result)
+
+        # 获取语言代码缩写
+        language_code = TARGET_LANGUAGES[target_language]['code']
+
+        if result['status'] == 'success':
+            translation_dict = {
+                f'title_{language_code}': result.get('translated_title', ''),
+                f'description_{language_code}': result.get('translated_description', ''),
+                f'content_{language_code}': result.get('translated_content', '')
+            }
+        elif result['status'] == 'success_raw':
+            # 如果是原始翻译结果，尝试使用raw_translation
+            translation_dict = {
+                f'title_{language_code}': result.get('raw_translation', ''),
+                f'description_{language_code}': result.get('raw_translation', ''),
+                f'content_{language_code}': result.get('raw_translation', '')
+            }
+        else:
+            # 翻译失败的情况
+            errors[language_code] = result.get('error', '未知错误')
+            translation_dict = {
+                f'title_{language_code}': f"翻译失败: {result.get('error', '未知错误')}",
+                f'description_{language_code}': f"翻译失败: {result.get('error', '未知错误')}",
+                f'content_{language_code}': f"翻译失败: {result.get('error', '未知错误')}"
+            }
+            has_error = True
+
+        if result.get('validation_errors'):
+            validation_errors[language_code] = result['validation_errors']
+
+        translations.append(translation_dict)
+
+    # 数据转换
+    with profiling.span('reshape'):
+        translations_dict = defaultdict(dict)
+        for translation in translations:
+            key_list = list(translation.keys())
+            key_0, code = key_list[0].split('_',maxsplit=1)
+            key_1 = key_list[1].split('_')[0]
+            key_2 = key_list[2].split('_')[0]
+            if '翻译失败' not in translation[key_list[0]]:
+                translations_dict[key_0][code] = translation[key_list[0]]
+                translations_dict[key_1][code] = translation[key_list[1]]
+                translations_dict[key_2][code] = translation[key_list[2]]
+            # 繁体（台），繁体（港），越南，handi，日文，英文
+            # TW  ZH_HK VI HI JA EN
+    if len(translations_dict) == 0:
+        return {
+            'news_id': news_id,
+            'status': 'error',
+            'timestamp': datetime.now().isoformat(),
+            'error': '翻译完全失败',
+            'errors': errors
+        }, 500
+    # 确定整体状态
+    overall_status = 'partial_success' if has_error else 'success'
 
+    payload = {
+        'news_id': news_id,
+        'status': overall_status,
+        'timestamp': datetime.now().isoformat(),
+        'data': translations_dict
+    }
+    # 失败的语言和未通过校验的字段单独列出，不再静默丢弃
+    if errors:
+        payload['errors'] = errors
+    if validation_errors:
+        payload['validation_errors'] = validation_errors
+    return payload, 200
 
-# 初始化翻译服务
-translation_service = TranslationService()
 
+def run_callback_job(callback_url: str, callback_mode: str, news_id: str, title: str, description: str,
+                     content: str, target_languages: List[str], split_mode: bool = False,
+                     cached: Optional[Dict[str, Dict[str, Any]]] = None, admission=None):
+    """
+    后台执行多语言翻译，并将结果推送到回调地址
 
-@app.route('/health', methods=['GET'])
+    callback_mode 为 per_language 时每种语言完成后推送一次 language 事件
+    （分离模式下标题/描述完成时额外推送 headline 事件），最后统一推送 completed 事件，
+    其内容与同步调用 /translate/multi 的返回一致。同一任务的回调按顺序逐个推送，completed 一定最后到达。admission 为接受请求时的准入凭据，任务结束后释放。
+    """
+    webhooks = WebhookSequence(components().webhook_dispatcher, callback_url)
+    on_result = None
+    on_headline = None
+    if callback_mode == 'per_language':
+        def on_result(target_language: str, result: Dict[str, Any]):
+            event = {
+                'event': 'language',
+                'news_id': news_id,
+                'target_language': target_language,
+                'language_code': result['language_code'],
+                'status': result['status'],
+                'timestamp': datetime.now().isoformat()
+            }
+            if result['status'] == 'success':
+                event['title'] = result.get('translated_title', '')
+                event['description'] = result.get('translated_description', '')
+                event['content'] = result.get('translated_content', '')
+            elif result['status'] == 'success_raw':
+                event['raw_translation'] = result.get('raw_translation', '')
+            else:
+                event['error'] = result.get('error', '未知错误')
+            webhooks.deliver(event)
+
+        def on_headline(result: Dict[str, Any]):
+            event = {
+                'event': 'headline',
+                'news_id': news_id,
+                'target_language': result['target_language'],
+                'language_code': result['language_code'],
+                'status': result['status'],
+                'timestamp': datetime.now().isoformat()
+            }
+            if result['status'] == 'success':
+                event['title'] = result['translated_title']
+                event['description'] = result['translated_description']
+            else:
+                event['error'] = result.get('error', '未知错误')
+            webhooks.deliver(event)
+
+    try:
+        with admission or nullcontext():
+            payload, _ = run_multi_translation(
+                news_id=news_id,
+                title=title,
+                description=description,
+                content=content,
+                target_languages=target_languages,
+                split_mode=split_mode,
+                on_result=on_result,
+                on_headline=on_headline,
+                cached=cached
+            )
+    except Exception as e:
+        logger.error(f"回调翻译任务失败 - 新闻ID: {news_id}, 错误: {str(e)}")
+        payload = {
+            'news_id': news_id,
+            'status': 'error',
+            'timestamp': datetime.now().isoformat(),
+            'error': '服务器内部错误',
+            'details': str(e)
+        }
+
+    payload['event'] = 'completed'
+    webhooks.deliver(payload)
+
+
+@bp.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
     return jsonify({
@@ -135,7 +704,7 @@ def health_check():
     })
 
 
-@app.route('/translate', methods=['POST'])
+@bp.route('/translate', methods=['POST'])
 def translate():
     """
     翻译接口
@@ -166,7 +735,6 @@ def translate():
         description = data['description']
         content = data['content']
         target_language = data['target_language']
-        print('ssssssssssssssssssssss', target_language)
         # 验证目标语言
         if target_language not in TARGET_LANGUAGES:
             return jsonify({
@@ -175,14 +743,26 @@ def translate():
                 'status': 'error'
             }), 400
 
-        # 执行翻译
-        result = translation_service.translate_content(
-            news_id=news_id,
-            title=title,
-            description=description,
-            content=content,
-            target_language=target_language
-        )
+        queued = components().work_queue is not None
+        admission, rejection = admit_request(news_id, data, calls=1, depth=1, queued=queued)
+        if rejection is not None:
+            return rejection
+
+        # 执行翻译（任务队列模式下由工作进程翻译、校验并保存）
+        with admission:
+            if queued:
+                result = translate_via_queue(news_id, title, description, content, [target_language],
+                                             use_graph=False)[target_language]
+            else:
+                result = components().translation_service.translate_content(
+                    news_id=news_id,
+                    title=title,
+                    description=description,
+                    content=content,
+                    target_language=target_language
+                )
+        if not queued:
+            record_translation(result)
 
         if result['status'] == 'error':
             return jsonify(result), 500
@@ -198,7 +778,7 @@ def translate():
         }), 500
 
 
-@app.route('/translate/batch', methods=['POST'])
+@bp.route('/translate/batch', methods=['POST'])
 def translate_batch():
     """
     批量翻译接口
@@ -245,17 +825,30 @@ def translate_batch():
                 'status': 'error'
             }), 400
 
-        # 执行批量翻译
+        queued = components().work_queue is not None
+        admission, rejection = admit_request(news_id, data, calls=len(target_languages),
+                                             depth=len(target_languages), queued=queued)
+        if rejection is not None:
+            return rejection
+
+        # 执行批量翻译（任务队列模式下由工作进程翻译、校验并保存）
         results = []
-        for target_language in target_languages:
-            result = translation_service.translate_content(
-                news_id=news_id,
-                title=title,
-                description=description,
-                content=content,
-                target_language=target_language
-            )
-            results.append(result)
+        with admission:
+            if queued:
+                translated = translate_via_queue(news_id, title, description, content, target_languages,
+                                                 use_graph=False)
+                results = [translated[target_language] for target_language in target_languages]
+            else:
+                for target_language in target_languages:
+                    result = components().translation_service.translate_content(
+                        news_id=news_id,
+                        title=title,
+                        description=description,
+                        content=content,
+                        target_language=target_language
+                    )
+                    record_translation(result)
+                    results.append(result)
 
         return jsonify({
             'news_id': news_id,
@@ -274,7 +867,7 @@ def translate_batch():
         }), 500
 
 
-@app.route('/translate/multi', methods=['POST'])
+@bp.route('/translate/multi', methods=['POST'])
 def translate_multi():
     """
     多语言翻译接口
@@ -285,7 +878,11 @@ def translate_multi():
         "title": "标题",
         "description": "描述",
         "content": "正文",
-        "target_languages": ["目标语言代码1", "目标语言代码2"]
+        "target_languages": ["目标语言代码1", "目标语言代码2"],
+        "split_mode": false,  // 可选，标题/描述走快速通道单独翻译
+        "callback_url": "http://...",  // 可选，提供后立即返回202，翻译完成后POST到该地址
+        "callback_mode": "final",  // 可选，final 或 per_language
+        "timing": false  // 可选，返回各阶段耗时（timing 字段和 Server-Timing 响应头）
     }
     
     返回格式:
@@ -348,79 +945,195 @@ def translate_multi():
                 'supported_languages': list(TARGET_LANGUAGES.keys())
             }), 400
 
-        # 执行多语言翻译
-        translations = []
-        has_error = False
+        split_mode = bool(data.get('split_mode', False))
+        callback_url = data.get('callback_url')
+        if callback_url:
+            # 回调模式：立即接受请求，翻译完成后推送到 callback_url
+            reason = components().webhook_dispatcher.check_url(callback_url)
+            if reason is not None:
+                return jsonify({
+                    'news_id': news_id,
+                    'status': 'error',
+                    'timestamp': datetime.now().isoformat(),
+                    'error': reason
+                }), 400
 
-        for target_language in target_languages:
-            result = translation_service.translate_content(
+            callback_mode = data.get('callback_mode', 'final')
+            if callback_mode not in ('final', 'per_language'):
+                return jsonify({
+                    'news_id': news_id,
+                    'status': 'error',
+                    'timestamp': datetime.now().isoformat(),
+                    'error': "callback_mode 必须是 'final' 或 'per_language'"
+                }), 400
+
+        # 缓存命中的语言不需要调用模型，不计入准入控制
+        parts = components()
+        cached = lookup_cached_translations(news_id, title, description, content, target_languages)
+        pending_languages = [lang for lang in dict.fromkeys(target_languages) if lang not in cached]
+        calls = len(pending_languages) * (2 if split_mode else 1)
+        # 回调任务排队已满时拒绝，避免后台任务无限积压
+        if callback_url and not parts.callback_slots.acquire(blocking=False):
+            logger.warning(f"回调任务积压已满，拒绝请求 - 新闻ID: {news_id}")
+            return jsonify({
+                'news_id': news_id,
+                'status': 'error',
+                'timestamp': datetime.now().isoformat(),
+                'error': '回调任务积压过多，请稍后重试',
+                'retry_after': CALLBACK_RETRY_AFTER
+            }), 503, {'Retry-After': str(CALLBACK_RETRY_AFTER)}
+        admission, rejection = admit_request(news_id, data, calls=calls,
+                                             depth=translation_depth(pending_languages, split_mode),
+                                             queued=parts.work_queue is not None,
+                                             blocking=not callback_url)
+        if rejection is not None:
+            if callback_url:
+                parts.callback_slots.release()
+            return rejection
+
+        if callback_url:
+            # 后台线程中没有请求上下文，在当前应用的上下文中执行；任务结束后释放排队名额
+            try:
+                future = parts.callback_executor.get().submit(
+                    run_in_app_context, current_app._get_current_object(), run_callback_job, callback_url,
+                    callback_mode, news_id, title, description, content, target_languages,
+                    split_mode, cached, admission
+                )
+            except Exception:
+                parts.callback_slots.release()
+                raise
+            future.add_done_callback(lambda _: parts.callback_slots.release())
+            return jsonify({
+                'news_id': news_id,
+                'status': 'accepted',
+                'timestamp': datetime.now().isoformat(),
+                'callback_url': callback_url,
+                'callback_mode': callback_mode
+            }), 202
+
+        with admission:
+            payload, status_code = run_multi_translation(
                 news_id=news_id,
                 title=title,
                 description=description,
                 content=content,
-                target_language=target_language
+                target_languages=target_languages,
+                split_mode=split_mode,
+                cached=cached
             )
-            print(f'target_language:{target_language}  结果:{result}')
+        return jsonify(payload), status_code
 
-            # 获取语言代码缩写
-            language_code = TARGET_LANGUAGES[target_language]['code']
+    except Exception as e:
+        logger.error(f"多语言翻译请求处理失败: {str(e)}")
+        return jsonify({
+            'news_id': data.get('news_id', '') if 'data' in locals() else '',
+            'status': 'error',
+            'timestamp': datetime.now().isoformat(),
+            'error': '服务器内部错误',
+            'details': str(e)
+        }), 500
 
-            if result['status'] == 'success':
-                translation_dict = {
-                    f'title_{language_code}': result.get('translated_title', ''),
-                    f'description_{language_code}': result.get('translated_description', ''),
-                    f'content_{language_code}': result.get('translated_content', '')
-                }
-            elif result['status'] == 'success_raw':
-                # 如果是原始翻译结果，尝试使用raw_translation
-                translation_dict = {
-                    f'title_{language_code}': result.get('raw_translation', ''),
-                    f'description_{language_code}': result.get('raw_translation', ''),
-                    f'content_{language_code}': result.get('raw_translation', '')
-                }
-            else:
-                # 翻译失败的情况
-                translation_dict = {
-                    f'title_{language_code}': f"翻译失败: {result.get('error', '未知错误')}",
-                    f'description_{language_code}': f"翻译失败: {result.get('error', '未知错误')}",
-                    f'content_{language_code}': f"翻译失败: {result.get('error', '未知错误')}"
-                }
-                has_error = True
 
-            translations.append(translation_dict)
+@bp.route('/translate/headline', methods=['POST'])
+def translate_headline():
+    """
+    标题/描述快速翻译接口（不翻译正文）
 
-        # 数据转换
+    请求参数:
+    {
+        "news_id": "新闻ID",
+        "title": "标题",
+        "description": "描述",
+        "target_languages": ["目标语言代码1", "目标语言代码2"]
+    }
+
+    返回格式与 /translate/multi 相同，data 中只包含 title 和 description
+    """
+    try:
+        data = request.get_json()
+
+        # 验证必需参数
+        required_fields = ['news_id', 'title', 'description', 'target_languages']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({
+                    'news_id': data.get('news_id', ''),
+                    'status': 'error',
+                    'timestamp': datetime.now().isoformat(),
+                    'error': f'缺少必需参数: {field}'
+                }), 400
+
+        news_id = data['news_id']
+        target_languages = data['target_languages']
+
+        if not isinstance(target_languages, list):
+            return jsonify({
+                'news_id': news_id,
+                'status': 'error',
+                'timestamp': datetime.now().isoformat(),
+                'error': 'target_languages 必须是数组'
+            }), 400
+
+        unsupported_languages = [lang for lang in target_languages if lang not in TARGET_LANGUAGES]
+        if unsupported_languages:
+            return jsonify({
+                'news_id': news_id,
+                'status': 'error',
+                'timestamp': datetime.now().isoformat(),
+                'error': f'不支持的目标语言: {unsupported_languages}',
+                'supported_languages': list(TARGET_LANGUAGES.keys())
+            }), 400
+
+        queued = components().work_queue is not None
+        admission, rejection = admit_request(news_id, data, calls=len(target_languages), depth=1, queued=queued,
+                                             priority=Config.WORK_QUEUE_HEADLINE_PRIORITY)
+        if rejection is not None:
+            return rejection
+
+        translation_service = components().translation_service
+        with admission:
+            if queued:
+                # 任务队列模式下标题任务以高优先级入队，工作进程先于常规翻译任务领取
+                headlines = translate_headlines_via_queue(news_id, data['title'], data['description'],
+                                                          target_languages)
+                results = list(headlines.values())
+            else:
+                futures = [
+                    profiling.submit(
+                        translation_service.headline_executor,
+                        translation_service.translate_headline, news_id, data['title'], data['description'], lang
+                    )
+                    for lang in target_languages
+                ]
+                results = [future.result() for future in futures]
+
+        has_error = False
         translations_dict = defaultdict(dict)
-        for translation in translations:
-            key_list = list(translation.keys())
-            key_0, code = key_list[0].split('_',maxsplit=1)
-            key_1 = key_list[1].split('_')[0]
-            key_2 = key_list[2].split('_')[0]
-            if '翻译失败' not in translation[key_list[0]]:
-                translations_dict[key_0][code] = translation[key_list[0]]
-                translations_dict[key_1][code] = translation[key_list[1]]
-                translations_dict[key_2][code] = translation[key_list[2]]
-            # 繁体（台），繁体（港），越南，handi，日文，英文
-            # TW  ZH_HK VI HI JA EN
+        for result in results:
+            if result['status'] != 'success':
+                has_error = True
+                continue
+            code = result['language_code']
+            translations_dict['title'][code] = result['translated_title']
+            translations_dict['description'][code] = result['translated_description']
+
         if len(translations_dict) == 0:
             return jsonify({
-                'news_id': data.get('news_id', '') if 'data' in locals() else '',
+                'news_id': news_id,
                 'status': 'error',
                 'timestamp': datetime.now().isoformat(),
                 'error': '翻译完全失败'
             }), 500
-        # 确定整体状态
-        overall_status = 'partial_success' if has_error else 'success'
 
         return jsonify({
             'news_id': news_id,
-            'status': overall_status,
+            'status': 'partial_success' if has_error else 'success',
             'timestamp': datetime.now().isoformat(),
             'data': translations_dict
         })
 
     except Exception as e:
-        logger.error(f"多语言翻译请求处理失败: {str(e)}")
+        logger.error(f"标题翻译请求处理失败: {str(e)}")
         return jsonify({
             'news_id': data.get('news_id', '') if 'data' in locals() else '',
             'status': 'error',
@@ -430,7 +1143,88 @@ def translate_multi():
         }), 500
 
 
-@app.route('/languages', methods=['GET'])
+@bp.route('/translations/<news_id>', methods=['GET'])
+def get_translations(news_id):
+    """
+    查询已保存的翻译结果（不调用模型）
+
+    查询参数:
+        language: 目标语言代码（可选）
+
+    返回格式与 /translate/multi 相同，另外 records 中包含每种语言的原文哈希、模型和翻译时间
+    """
+    translation_store = components().translation_store
+    if translation_store is None:
+        return jsonify({
+            'news_id': news_id,
+            'status': 'error',
+            'timestamp': datetime.now().isoformat(),
+            'error': '未启用翻译结果存储'
+        }), 404
+
+    try:
+        rows = translation_store.get_by_news_id(news_id, request.args.get('language'))
+    except Exception as e:
+        logger.error(f"翻译结果查询失败 - 新闻ID: {news_id}, 错误: {str(e)}")
+        return jsonify({
+            'news_id': news_id,
+            'status': 'error',
+            'timestamp': datetime.now().isoformat(),
+            'error': '服务器内部错误',
+            'details': str(e)
+        }), 500
+
+    if not rows:
+        return jsonify({
+            'news_id': news_id,
+            'status': 'error',
+            'timestamp': datetime.now().isoformat(),
+            'error': '未找到翻译结果'
+        }), 404
+
+    translations_dict = defaultdict(dict)
+    records = []
+    for row in rows:
+        code = row['language_code']
+        if row['status'] == 'success_raw':
+            # 与 /translate/multi 保持一致，原始结果填入所有字段
+            for field in ('title', 'description', 'content'):
+                translations_dict[field][code] = row['raw_translation']
+        else:
+            for field in ('title', 'description', 'content'):
+                translations_dict[field][code] = row[field]
+        records.append({
+            'target_language': row['target_language'],
+            'source_hash': row['source_hash'],
+            'model': row['model'],
+            'status': row['status'],
+            'created_at': row['created_at']
+        })
+
+    return jsonify({
+        'news_id': news_id,
+        'status': 'success',
+        'timestamp': datetime.now().isoformat(),
+        'data': translations_dict,
+        'records': records
+    })
+
+
+@bp.route('/stats', methods=['GET'])
+def get_stats():
+    """运行统计接口"""
+    parts = components()
+    hedger = parts.translation_service.hedger
+    admission = parts.translation_service.admission
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'hedging': hedger.stats() if hedger is not None else None,
+        'work_queue': parts.work_queue.stats() if parts.work_queue is not None else None,
+        'admission': admission.stats() if admission is not None else None
+    })
+
+
+@bp.route('/languages', methods=['GET'])
 def get_supported_languages():
     """获取支持的语言列表"""
     return jsonify({
@@ -445,9 +1239,14 @@ def get_supported_languages():
     })
 
 
+app = create_app()
+
+
 if __name__ == '__main__':
+    configure_stdio()
     # 检查环境变量
     if not Config.OPENAI_API_KEY:
         logger.warning("警告: 未设置 OPENAI_API_KEY 环境变量")
 
-    app.run(debug=Config.DEBUG, host=Config.HOST, port=Config.PORT)
+    # 多线程处理请求，翻译请求阻塞时 /health、/languages 仍能及时响应
+    app.run(debug=Config.DEBUG, host=Config.HOST, port=Config.PORT, threaded=True)
@@ -1,11 +1,18 @@
 #!/bin/bash
 # 加载conda环境变量（关键步骤）
 source /home/ubuntu/anaconda3/etc/profile.d/conda.sh
-LOG_DIR="/data/workspace/news_translation_service/logs"
+APP_DIR="/data/workspace/news_translation_service"
+LOG_DIR="$APP_DIR/logs"
 
 TIMESTAMP=$(date +%Y%m%d)
 # 激活conda环境
 conda activate /data/workspace/envs/newsenv
 
-# 启动Flask应用
-nohup python /data/workspace/news_translation_service/app.py >/dev/null 2>>$LOG_DIR/app_$TIMESTAMP.log &
\ No newline at end of file
+# 启动gunicorn（配置见 gunicorn.conf.py，工作进程数等可用 GUNICORN_* 环境变量调整）
+# 更新代码后平滑重载（preload_app 开启时 HUP 只重启工作进程，仍运行 master 已加载的旧代码）：
+#   kill -USR2 $(cat gunicorn.pid)            # 启动加载新代码的 master，旧 pid 文件改名为 gunicorn.pid.oldbin
+#   kill -TERM $(cat gunicorn.pid.oldbin)     # 新进程正常服务后平滑退出旧 master
+# 只回收工作进程（不更新代码、配置）：kill -HUP <master pid>；平滑退出：kill -TERM <master pid>
+cd $APP_DIR
+export PYTHONIOENCODING=utf-8
+nohup gunicorn -c gunicorn.conf.py --pid $APP_DIR/gunicorn.pid app:app >/dev/null 2>>$LOG_DIR/app_$TIMESTAMP.log &
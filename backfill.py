@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线回填：通过 Batch API 批量翻译历史新闻
+
+输入为 JSONL，每行一条新闻：
+    {"news_id": "...", "title": "...", "description": "...", "content": "...", "target_languages": ["en", "ja"]}
+target_languages 可省略，使用命令行 --languages 指定的默认语言。
+
+用法：
+    python backfill.py run news.jsonl -o results.jsonl --languages zh_TW zh_HK vi ja en hi
+    python backfill.py submit news.jsonl --state backfill_state.json
+    python backfill.py collect --state backfill_state.json -o results.jsonl
+
+输出为 JSONL，每行格式与 /translate/multi 的返回一致，另外附带 errors 和 validation_errors。
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+import openai
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config, LanguageConfig
+from store import TranslationStore
+from validation import extract_translation_json, validate_translation, TRANSLATION_FIELDS
+
+logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+logger = logging.getLogger(__name__)
+
+TARGET_LANGUAGES = LanguageConfig.get_target_languages()
+
+CUSTOM_ID_SEPARATOR = '::'
+BATCH_ENDPOINT = '/v1/chat/completions'
+FINAL_BATCH_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+def read_articles(input_path: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    读取输入JSONL，跳过无法解析的行
+
+    Returns:
+        [(行号, 新闻)]。同一新闻可能出现多次（如更新后的版本），用行号区分
+    """
+    articles = []
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                articles.append((line_no, json.loads(line)))
+            except json.JSONDecodeError as e:
+                logger.error(f"第 {line_no} 行不是合法JSON，已跳过: {str(e)}")
+    return articles
+
+
+def article_languages(article: Dict[str, Any], default_languages: List[str]) -> List[str]:
+    """新闻的目标语言（去重）"""
+    return list(dict.fromkeys(article.get('target_languages') or default_languages))
+
+
+def custom_id(line_no: int, lang: str) -> str:
+    """按输入行号和语言生成请求ID，同一 batch 内不会重复"""
+    return f'{line_no}{CUSTOM_ID_SEPARATOR}{lang}'
+
+
+def build_batch_requests(articles: List[Tuple[int, Dict[str, Any]]], default_languages: List[str]
+                         ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, str]]]:
+    """
+    把新闻 × 目标语言展开为 Batch API 请求
+
+    提示词与在线接口相同，由 LanguageConfig 中的 prompt_template 构建。
+
+    Args:
+        articles: read_articles 返回的 [(行号, 新闻)]
+        default_languages: 未指定 target_languages 时使用的目标语言
+
+    Returns:
+        (请求列表, 构建阶段的错误 {行号: {目标语言: 错误信息}})
+    """
+    requests = []
+    errors = defaultdict(dict)
+    for line_no, article in articles:
+        news_id = str(article.get('news_id', ''))
+        target_languages = article_languages(article, default_languages)
+        missing = [field for field in ('news_id', 'title', 'description', 'content') if field not in article]
+        if missing:
+            logger.error(f"第 {line_no} 行新闻 {news_id or '<无ID>'} 缺少必需参数: {missing}，已跳过")
+            for lang in target_languages:
+                errors[str(line_no)][lang] = f'缺少必需参数: {missing}'
+            continue
+
+        for lang in target_languages:
+            if lang not in TARGET_LANGUAGES:
+                errors[str(line_no)][lang] = f'不支持的目标语言: {lang}'
+                continue
+            prompt = TARGET_LANGUAGES[lang]['prompt_template'].format(
+                title=article['title'],
+                description=article['description'],
+                content=article['content']
+            )
+            requests.append({
+                'custom_id': custom_id(line_no, lang),
+                'method': 'POST',
+                'url': BATCH_ENDPOINT,
+                'body': {
+                    'model': Config.OPENAI_MODEL,
+                    'messages': [{'role': 'user', 'content': prompt}],
+                    'temperature': Config.OPENAI_TEMPERATURE,
+                    'max_tokens': Config.OPENAI_MAX_TOKENS
+                }
+            })
+    return requests, dict(errors)
+
+
+def split_batches(requests: List[Dict[str, Any]], max_requests_per_batch: int,
+                  max_bytes_per_batch: int) -> List[List[bytes]]:
+    """按请求数和输入文件大小上限把请求分为多个 batch，返回每个 batch 的JSONL行"""
+    chunks = []
+    chunk, chunk_bytes = [], 0
+    for item in requests:
+        line = (json.dumps(item, ensure_ascii=False) + '\n').encode('utf-8')
+        if chunk and (len(chunk) >= max_requests_per_batch or chunk_bytes + len(line) > max_bytes_per_batch):
+            chunks.append(chunk)
+            chunk, chunk_bytes = [], 0
+        chunk.append(line)
+        chunk_bytes += len(line)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def submit_batches(client: openai.OpenAI, requests: List[Dict[str, Any]], work_dir: str,
+                   max_requests_per_batch: int, max_bytes_per_batch: int) -> List[str]:
+    """
+    写出批量请求文件、上传并创建 batch
+
+    Returns:
+        batch ID 列表
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    batch_ids = []
+    for index, chunk in enumerate(split_batches(requests, max_requests_per_batch, max_bytes_per_batch)):
+        input_path = os.path.join(work_dir, f'batch_input_{index:04d}.jsonl')
+        with open(input_path, 'wb') as f:
+            f.writelines(chunk)
+
+        with open(input_path, 'rb') as f:
+            input_file = client.files.create(file=f, purpose='batch')
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window='24h',
+            metadata={'source': 'news_translation_backfill'}
+        )
+        logger.info(f"已提交 batch {batch.id}，请求数: {len(chunk)}，输入文件: {input_path}")
+        batch_ids.append(batch.id)
+    return batch_ids
+
+
+def wait_for_batches(client: openai.OpenAI, batch_ids: List[str], poll_interval: float) -> Dict[str, Any]:
+    """轮询直到所有 batch 结束，返回 {batch_id: batch}"""
+    finished = {}
+    while len(finished) < len(batch_ids):
+        for batch_id in batch_ids:
+            if batch_id in finished:
+                continue
+            batch = client.batches.retrieve(batch_id)
+            if batch.status in FINAL_BATCH_STATUSES:
+                finished[batch_id] = batch
+                logger.info(f"batch {batch_id} 已结束，状态: {batch.status}")
+        if len(finished) < len(batch_ids):
+            time.sleep(poll_interval)
+    return finished
+
+
+def download_outputs(client: openai.OpenAI, batches: Dict[str, Any]
+                     ) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    下载 batch 输出和错误文件
+
+    Returns:
+        ({custom_id: 模型返回文本}, {custom_id: 错误信息})
+    """
+    outputs = {}
+    failures = {}
+    for batch_id, batch in batches.items():
+        if batch.status != 'completed':
+            failures[f'batch:{batch_id}'] = f'batch 状态为 {batch.status}'
+
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                custom_id = item.get('custom_id')
+                response = item.get('response') or {}
+                if item.get('error') or response.get('status_code') != 200:
+                    failures[custom_id] = str(item.get('error') or response.get('body'))
+                    continue
+                try:
+                    outputs[custom_id] = response['body']['choices'][0]['message']['content']
+                except (KeyError, IndexError, TypeError) as e:
+                    failures[custom_id] = f'返回格式异常: {str(e)}'
+
+        if batch.error_file_id:
+            for line in client.files.content(batch.error_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                failures[item.get('custom_id')] = str(item.get('error') or response.get('body'))
+    return outputs, failures
+
+
+def merge_results(articles: List[Tuple[int, Dict[str, Any]]], default_languages: List[str], outputs: Dict[str, str],
+                  failures: Dict[str, str], build_errors: Dict[str, Dict[str, str]],
+                  article_index: Dict[str, str] = None, store: TranslationStore = None) -> List[Dict[str, Any]]:
+    """
+    把 batch 输出按输入行号合并为 /translate/multi 的返回格式，逐条处理错误
+
+    Args:
+        article_index: 提交时保存的 {行号: news_id}，用于发现提交后被修改的输入文件
+
+    Returns:
+        每条新闻（输入行）一个结果字典
+    """
+    batch_failures = {key: value for key, value in failures.items() if key and key.startswith('batch:')}
+    results = []
+    for line_no, article in articles:
+        news_id = str(article.get('news_id', ''))
+        target_languages = article_languages(article, default_languages)
+        source = {field: article.get(field, '') for field in TRANSLATION_FIELDS}
+        translations_dict = defaultdict(dict)
+        errors = {}
+        validation_errors = {}
+        line_errors = build_errors.get(str(line_no), {})
+        if article_index is not None and article_index.get(str(line_no)) != news_id:
+            logger.error(f"第 {line_no} 行的新闻与提交时不一致，输入文件可能已被修改")
+            line_errors = {lang: '输入文件在提交后被修改' for lang in target_languages}
+
+        for lang in target_languages:
+            request_id = custom_id(line_no, lang)
+            code = TARGET_LANGUAGES[lang]['code'] if lang in TARGET_LANGUAGES else lang
+            if lang in line_errors:
+                errors[code] = line_errors[lang]
+                continue
+            if request_id in failures:
+                errors[code] = failures[request_id]
+                continue
+            if request_id not in outputs:
+                errors[code] = next(iter(batch_failures.values()), '未返回结果')
+                continue
+
+            parsed_result = extract_translation_json(outputs[request_id])
+            if parsed_result is None:
+                errors[code] = '译文无法解析'
+                continue
+
+            translated = {field: parsed_result.get(field, '') for field in TRANSLATION_FIELDS}
+            failed_fields = validate_translation(translated, source, TARGET_LANGUAGES[lang])
+            if failed_fields:
+                validation_errors[code] = failed_fields
+            for field in TRANSLATION_FIELDS:
+                translations_dict[field][code] = translated[field]
+
+            if store is not None:
+                store.record({
+                    'news_id': news_id,
+                    'target_language': lang,
+                    'language_code': code,
+                    'translated_title': translated['title'],
+                    'translated_description': translated['description'],
+                    'translated_content': translated['content'],
+                    'original_title': source['title'],
+                    'original_description': source['description'],
+                    'original_content': source['content'],
+                    'validation_errors': failed_fields,
+                    'timestamp': datetime.now().isoformat(),
+                    'status': 'success'
+                }, Config.OPENAI_MODEL)
+
+        if not translations_dict:
+            status = 'error'
+        else:
+            status = 'partial_success' if errors else 'success'
+        result = {
+            'news_id': news_id,
+            'status': status,
+            'timestamp': datetime.now().isoformat(),
+            'data': translations_dict
+        }
+        if errors:
+            result['errors'] = errors
+        if validation_errors:
+            result['validation_errors'] = validation_errors
+        results.append(result)
+    return results
+
+
+def write_results(results: List[Dict[str, Any]], output_path: str):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+    success_count = sum(1 for r in results if r['status'] == 'success')
+    partial_count = sum(1 for r in results if r['status'] == 'partial_success')
+    logger.info(f"结果已保存到: {output_path}，完全成功: {success_count}，部分成功: {partial_count}，"
+                f"失败: {len(results) - success_count - partial_count}")
+
+
+def save_state(state_path: str, state: Dict[str, Any]):
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def load_state(state_path: str) -> Dict[str, Any]:
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _add_submit_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('input', help='输入新闻JSONL')
+    parser.add_argument('--languages', nargs='+', default=list(TARGET_LANGUAGES.keys()), help='默认目标语言')
+    parser.add_argument('--work-dir', default='backfill_work', help='批量请求文件目录')
+    parser.add_argument('--max-requests-per-batch', type=int, default=Config.BACKFILL_MAX_REQUESTS_PER_BATCH)
+    parser.add_argument('--max-bytes-per-batch', type=int, default=Config.BACKFILL_MAX_BYTES_PER_BATCH,
+                        help='每个 batch 输入文件的最大字节数')
+
+
+def _add_collect_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('-o', '--output', default='backfill_results.jsonl', help='输出结果JSONL')
+    parser.add_argument('--poll-interval', type=float, default=Config.BACKFILL_POLL_INTERVAL, help='轮询间隔（秒）')
+    parser.add_argument('--store', action='store_true', help='同时保存到翻译结果存储')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通过 Batch API 离线回填新闻翻译')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='提交并等待完成')
+    submit_parser = subparsers.add_parser('submit', help='只提交')
+    collect_parser = subparsers.add_parser('collect', help='等待已提交的 batch 并合并结果')
+    for sub in (run_parser, submit_parser):
+        _add_submit_arguments(sub)
+    for sub in (run_parser, collect_parser):
+        _add_collect_arguments(sub)
+    for sub in (run_parser, submit_parser, collect_parser):
+        sub.add_argument('--state', default='backfill_state.json', help='batch 状态文件')
+
+    args = parser.parse_args()
+    client = openai.OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL)
+
+    if args.command in ('run', 'submit'):
+        articles = read_articles(args.input)
+        requests, build_errors = build_batch_requests(articles, args.languages)
+        logger.info(f"读取 {len(articles)} 条新闻，共 {len(requests)} 个翻译请求")
+        batch_ids = submit_batches(client, requests, args.work_dir, args.max_requests_per_batch,
+                                   args.max_bytes_per_batch) if requests else []
+        save_state(args.state, {
+            'input': os.path.abspath(args.input),
+            'languages': args.languages,
+            'articles': {str(line_no): str(article.get('news_id', '')) for line_no, article in articles},
+            'batch_ids': batch_ids,
+            'build_errors': build_errors,
+            'submitted_at': datetime.now().isoformat()
+        })
+        logger.info(f"batch 状态已保存到: {args.state}")
+        if args.command == 'submit':
+            return 0
+
+    state = load_state(args.state)
+    articles = read_articles(state['input'])
+    batches = wait_for_batches(client, state['batch_ids'], args.poll_interval)
+    outputs, failures = download_outputs(client, batches)
+
+    store = None
+    if args.store:
+        store = TranslationStore(Config.STORE_PATH, batch_size=Config.STORE_BATCH_SIZE,
+                                 flush_interval=Config.STORE_FLUSH_INTERVAL)
+    results = merge_results(articles, state['languages'], outputs, failures, state['build_errors'],
+                            state.get('articles'), store)
+    if store is not None:
+        store.flush()
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -1,4 +1,5 @@
 import os
+import json
 from typing import Dict, Any
 
 class Config:
@@ -9,12 +10,111 @@ class Config:
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o')
     OPENAI_TEMPERATURE = float(os.getenv('OPENAI_TEMPERATURE', '0.3'))
     OPENAI_MAX_TOKENS = int(os.getenv('OPENAI_MAX_TOKENS', '4000'))
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
     
     # Flask配置
     DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', '5000'))
     
+    # 标题/描述快速通道配置
+    HEADLINE_MAX_TOKENS = int(os.getenv('HEADLINE_MAX_TOKENS', '600'))
+    HEADLINE_WORKERS = int(os.getenv('HEADLINE_WORKERS', '12'))
+    BODY_WORKERS = int(os.getenv('BODY_WORKERS', '6'))
+
+    # 回调推送配置
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+    WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', '4'))
+    WEBHOOK_MAX_PENDING = int(os.getenv('WEBHOOK_MAX_PENDING', '200'))
+    WEBHOOK_MAX_RETRIES = int(os.getenv('WEBHOOK_MAX_RETRIES', '5'))
+    WEBHOOK_RETRY_BACKOFF = float(os.getenv('WEBHOOK_RETRY_BACKOFF', '1.0'))
+    WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', '10'))
+    # 允许的回调主机（逗号分隔，以 . 开头匹配子域名），为空时只允许公网地址
+    WEBHOOK_ALLOWED_HOSTS = [host for host in os.getenv('WEBHOOK_ALLOWED_HOSTS', '').split(',') if host.strip()]
+    CALLBACK_JOB_WORKERS = int(os.getenv('CALLBACK_JOB_WORKERS', '4'))
+    # 每个进程最多排队和执行中的回调模式翻译任务数，超过时返回 503
+    CALLBACK_MAX_PENDING = int(os.getenv('CALLBACK_MAX_PENDING', '100'))
+
+    # 翻译结果存储配置
+    STORE_ENABLED = os.getenv('STORE_ENABLED', 'True').lower() == 'true'
+    STORE_PATH = os.getenv('STORE_PATH', 'data/translations.db')
+    STORE_BATCH_SIZE = int(os.getenv('STORE_BATCH_SIZE', '50'))
+    STORE_FLUSH_INTERVAL = float(os.getenv('STORE_FLUSH_INTERVAL', '1.0'))
+
+    # 译文校验配置
+    VALIDATION_ENABLED = os.getenv('VALIDATION_ENABLED', 'True').lower() == 'true'
+    VALIDATION_MAX_RETRIES = int(os.getenv('VALIDATION_MAX_RETRIES', '1'))
+
+    # 性能分析配置
+    TIMING_ENABLED = os.getenv('TIMING_ENABLED', 'False').lower() == 'true'
+    PROFILE_SLOW_REQUESTS = os.getenv('PROFILE_SLOW_REQUESTS', 'False').lower() == 'true'
+    PROFILE_SLOW_THRESHOLD_MS = float(os.getenv('PROFILE_SLOW_THRESHOLD_MS', '10000'))
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '10'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+    # 对冲请求配置
+    HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'False').lower() == 'true'
+    HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '0.95'))
+    HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', '2.0'))
+    HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+    HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', '200'))
+    HEDGE_MAX_RATIO = float(os.getenv('HEDGE_MAX_RATIO', '0.1'))
+    HEDGE_BURST = float(os.getenv('HEDGE_BURST', '5'))
+    HEDGE_WORKERS = int(os.getenv('HEDGE_WORKERS', '32'))
+    # 开启对冲时单次模型调用的超时（秒），被放弃的调用超时后释放线程，0 表示使用客户端默认超时
+    HEDGE_REQUEST_TIMEOUT = float(os.getenv('HEDGE_REQUEST_TIMEOUT', '180'))
+
+    # 语言依赖配置（部分语言基于其他语言的译文生成）
+    LANGUAGE_DAG_ENABLED = os.getenv('LANGUAGE_DAG_ENABLED', 'False').lower() == 'true'
+    LANGUAGE_DAG_WORKERS = int(os.getenv('LANGUAGE_DAG_WORKERS', '6'))
+
+    # 任务队列配置（开启后翻译由 worker.py 工作进程完成）
+    WORK_QUEUE_ENABLED = os.getenv('WORK_QUEUE_ENABLED', 'False').lower() == 'true'
+    WORK_QUEUE_URL = os.getenv('WORK_QUEUE_URL', 'sqlite:///data/work_queue.db')
+    WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv('WORK_QUEUE_MAX_ATTEMPTS', '3'))
+    WORK_QUEUE_VISIBILITY_TIMEOUT = float(os.getenv('WORK_QUEUE_VISIBILITY_TIMEOUT', '300'))
+    WORK_QUEUE_POLL_INTERVAL = float(os.getenv('WORK_QUEUE_POLL_INTERVAL', '0.5'))
+    WORK_QUEUE_RETRY_DELAY = float(os.getenv('WORK_QUEUE_RETRY_DELAY', '5'))
+    WORK_QUEUE_RESULT_TIMEOUT = float(os.getenv('WORK_QUEUE_RESULT_TIMEOUT', '280'))
+    # 标题/描述任务（/translate/headline 和分离模式）的队列优先级，高于常规翻译任务
+    WORK_QUEUE_HEADLINE_PRIORITY = int(os.getenv('WORK_QUEUE_HEADLINE_PRIORITY', '10'))
+    # 已完成、死信和已取消任务的保留时间（秒），工作进程定期清理，0 表示不清理
+    WORK_QUEUE_RETENTION = float(os.getenv('WORK_QUEUE_RETENTION', str(7 * 24 * 3600)))
+    WORKER_THREADS = int(os.getenv('WORKER_THREADS', '4'))
+
+    # 离线回填配置
+    BACKFILL_POLL_INTERVAL = float(os.getenv('BACKFILL_POLL_INTERVAL', '60'))
+    BACKFILL_MAX_REQUESTS_PER_BATCH = int(os.getenv('BACKFILL_MAX_REQUESTS_PER_BATCH', '50000'))
+    # Batch API 输入文件上限为 200 MB
+    BACKFILL_MAX_BYTES_PER_BATCH = int(os.getenv('BACKFILL_MAX_BYTES_PER_BATCH', str(200 * 1000 * 1000)))
+
+    # 译文缓存与预翻译（feed_watcher.py 监听采集目录，提前翻译并写入存储）
+    CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'True').lower() == 'true'
+    FEED_WATCH_PATH = os.getenv('FEED_WATCH_PATH', 'data/feed')
+    FEED_TARGET_LANGUAGES = os.getenv('FEED_TARGET_LANGUAGES', '')
+    FEED_POLL_INTERVAL = float(os.getenv('FEED_POLL_INTERVAL', '10'))
+    FEED_SETTLE_SECONDS = float(os.getenv('FEED_SETTLE_SECONDS', '2'))
+    FEED_WORKERS = int(os.getenv('FEED_WORKERS', '1'))
+    FEED_QUEUE_PRIORITY = int(os.getenv('FEED_QUEUE_PRIORITY', '-10'))
+    # 预翻译进程记住的已处理新闻数，超过时淘汰最久未出现的
+    FEED_SEEN_MAX = int(os.getenv('FEED_SEEN_MAX', '100000'))
+
+    # 准入控制（预计完成时间超过客户端截止时间时返回503）
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'False').lower() == 'true'
+    ADMISSION_CAPACITY = int(os.getenv('ADMISSION_CAPACITY', '16'))
+    ADMISSION_MAX_PENDING_CALLS = int(os.getenv('ADMISSION_MAX_PENDING_CALLS', '200'))
+    ADMISSION_DEFAULT_DEADLINE = float(os.getenv('ADMISSION_DEFAULT_DEADLINE', '300'))
+    ADMISSION_INITIAL_LATENCY = float(os.getenv('ADMISSION_INITIAL_LATENCY', '20'))
+    ADMISSION_EWMA_ALPHA = float(os.getenv('ADMISSION_EWMA_ALPHA', '0.2'))
+    # 任务队列模式下按最近多少秒内完成的任务统计平均处理耗时
+    ADMISSION_QUEUE_LATENCY_WINDOW = float(os.getenv('ADMISSION_QUEUE_LATENCY_WINDOW', '300'))
+    # 单个进程同时接受的同步翻译请求数，默认比 gunicorn 每进程线程数少 4，为 /health 等接口保留线程
+    ADMISSION_MAX_REQUESTS = int(os.getenv(
+        'ADMISSION_MAX_REQUESTS', str(max(1, int(os.getenv('GUNICORN_THREADS', '16')) - 4))
+    ))
+    # 任务队列模式下整个队列（所有进程共享）最多积压的任务数
+    ADMISSION_MAX_QUEUED_TASKS = int(os.getenv('ADMISSION_MAX_QUEUED_TASKS', '1000'))
+
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 
@@ -28,32 +128,84 @@ class LanguageConfig:
             'zh_TW': {
                 'name': '繁体中文（台湾）',
                 'code': 'zh_TW',
-                'prompt_template': LanguageConfig._get_traditional_tw_prompt()
+                'prompt_template': LanguageConfig._get_traditional_tw_prompt(),
+                'fields_prompt_template': LanguageConfig._get_fields_prompt(
+                    '繁体中文（台湾用法）',
+                    '使用台湾地区的繁体中文用词习惯，如：软件→軟體、网络→網路、信息→資訊等'
+                ),
+                # 译文校验：文字类型和相对原文的长度比例范围
+                'script': 'hant',
+                'length_ratio': (0.7, 1.4)
             },
             'zh_HK': {
                 'name': '繁体中文（香港）',
                 'code': 'zh_HK',
-                'prompt_template': LanguageConfig._get_traditional_hk_prompt()
+                'prompt_template': LanguageConfig._get_traditional_hk_prompt(),
+                'fields_prompt_template': LanguageConfig._get_fields_prompt(
+                    '繁体中文（香港用法）',
+                    '使用香港地区的繁体中文用词习惯，如：出租车→的士、公交车→巴士、手机→手提電話等'
+                ),
+                'script': 'hant',
+                'length_ratio': (0.7, 1.4),
+                # 语言依赖（开启 LANGUAGE_DAG_ENABLED 时生效）：基于台湾繁体译文改写为香港用法
+                'derive_from': {
+                    'language': 'zh_TW',
+                    'mode': 'adapt',
+                    'prompt_template': LanguageConfig._get_hk_adaptation_prompt()
+                }
             },
             'vi': {
                 'name': '越南语',
                 'code': 'vi',
-                'prompt_template': LanguageConfig._get_vietnamese_prompt()
+                'prompt_template': LanguageConfig._get_vietnamese_prompt(),
+                'fields_prompt_template': LanguageConfig._get_fields_prompt(
+                    '越南语',
+                    '使用标准的越南语表达，注意越南语的声调标记'
+                ),
+                'script': 'latin',
+                'length_ratio': (1.2, 8.0),
+                # 参考英文译文统一专有名词译法
+                'derive_from': {
+                    'language': 'en',
+                    'mode': 'pivot'
+                }
             },
             'ja': {
                 'name': '日语',
                 'code': 'ja',
-                'prompt_template': LanguageConfig._get_japanese_prompt()
+                'prompt_template': LanguageConfig._get_japanese_prompt(),
+                'fields_prompt_template': LanguageConfig._get_fields_prompt(
+                    '日语',
+                    '使用标准的日语表达，正确使用平假名、片假名和汉字'
+                ),
+                'script': 'ja',
+                'length_ratio': (0.6, 2.5)
             },
             'en': {
                 'name': '英语',
                 'code': 'en',
-                'prompt_template': LanguageConfig._get_english_prompt()
+                'prompt_template': LanguageConfig._get_english_prompt(),
+                'fields_prompt_template': LanguageConfig._get_fields_prompt(
+                    '英语',
+                    '使用标准的英语表达，确保语法正确，用词准确'
+                ),
+                'script': 'latin',
+                'length_ratio': (1.2, 8.0)
             },
             'hi':{
                 'name': '印度语',
                 'code': 'hi',
-                'prompt_template': LanguageConfig._get_hindi_prompt()
+                'prompt_template': LanguageConfig._get_hindi_prompt(),
+                'fields_prompt_template': LanguageConfig._get_fields_prompt(
+                    '印地语（हिन्दी）',
+                    '使用标准印地语和天城文（देवनागरी）书写系统'
+                ),
+                'script': 'deva',
+                'length_ratio': (1.0, 8.0),
+                'derive_from': {
+                    'language': 'en',
+                    'mode': 'pivot'
+                }
             }
         }
     
@@ -234,7 +386,100 @@ class LanguageConfig:
     "content": "अनुवादित मुख्य पाठ"
 }}
     '''
-    
+
+    @staticmethod
+    def _get_hk_adaptation_prompt() -> str:
+        """获取台湾繁体改写为香港繁体的提示词"""
+        return '''
+你是一个专业的编辑，请将以下繁体中文（台湾用法）内容改写为繁体中文（香港用法）。
+
+改写要求：
+1. 只调整用词和表达习惯，不增删内容
+2. 使用香港地区的常用译法和用词，如：計程車→的士、公車→巴士、手機→手提電話等
+3. 保持原文的格式和结构
+
+请改写以下内容：
+标题：{title}
+描述：{description}
+正文：{content}
+
+请按照以下JSON格式返回改写结果：
+{{
+    "title": "改写后的标题",
+    "description": "改写后的描述",
+    "content": "改写后的正文"
+}}
+'''
+
+    @staticmethod
+    def build_pivot_reference(translated: Dict[str, str], language_name: str) -> str:
+        """
+        构建参考译文段落，附加在翻译提示词之后，用于统一人名、地名、机构名等专有名词的译法
+
+        Args:
+            translated: 参考译文字段
+            language_name: 参考译文的语言名称
+
+        Returns:
+            提示词段落
+        """
+        labels = LanguageConfig.FIELD_LABELS
+        reference = '\n'.join(f"{labels[key]}：{translated.get(key, '')}" for key in labels)
+        return (
+            f"\n以下是同一内容的{language_name}译文，仅供参考人名、地名、机构名等专有名词的译法，"
+            f"请仍以简体中文原文为准进行翻译：\n{reference}\n"
+        )
+
+    # 字段名与提示词中的中文标签对应关系
+    FIELD_LABELS = {
+        'title': '标题',
+        'description': '描述',
+        'content': '正文'
+    }
+
+    @staticmethod
+    def _get_fields_prompt(target_description: str, style_notes: str) -> str:
+        """获取按字段翻译的提示词（用于标题/描述快速通道等只翻译部分字段的场景）"""
+        return '''
+你是一个专业的翻译专家，请将以下简体中文内容翻译成{target}。
+
+翻译要求：
+1. {notes}
+2. 保持原文的语气和风格
+3. 确保翻译准确、自然、流畅
+4. 只翻译下面给出的字段，不要补充其他内容
+
+请翻译以下内容：
+{{fields}}
+
+请按照以下JSON格式返回翻译结果：
+{{json_format}}
+'''.format(target=target_description, notes=style_notes)
+
+    @staticmethod
+    def build_fields_prompt(language_config: Dict[str, Any], fields: Dict[str, str]) -> str:
+        """
+        构建只翻译指定字段的提示词
+
+        Args:
+            language_config: 目标语言配置
+            fields: 需要翻译的字段，如 {'title': '...', 'description': '...'}
+
+        Returns:
+            提示词
+        """
+        labels = LanguageConfig.FIELD_LABELS
+        fields_text = '\n'.join(f"{labels[key]}：{value}" for key, value in fields.items())
+        json_format = json.dumps(
+            {key: f'翻译后的{labels[key]}' for key in fields},
+            ensure_ascii=False,
+            indent=4
+        )
+        return language_config['fields_prompt_template'].format(
+            fields=fields_text,
+            json_format=json_format
+        )
+
     @staticmethod
     def add_custom_language(language_key: str, language_config: Dict[str, Any]) -> bool:
         """添加自定义语言配置（扩展功能）"""
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预翻译进程：监听采集目录中的新闻文件，在 CMS 调用 /translate/multi 之前提前翻译并写入存储
+
+支持与 test_data/translate_multi.py 输入相同的 CSV（id, customSubject, customBrief, customBody），
+以及每行一条新闻的 JSONL（字段同 CSV，或 news_id, title, description, content）。
+之后对同一原文的 /translate/multi 调用直接命中存储中的译文（CACHE_ENABLED=True）。
+
+开启任务队列时以较低优先级入队，由工作进程翻译，不会抢占线上请求；
+否则由本进程以 FEED_WORKERS 个线程直接翻译。
+
+用法：
+    python feed_watcher.py                      # 持续监听 FEED_WATCH_PATH
+    python feed_watcher.py --path news.csv --once
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config
+from store import TranslationStore, source_hash
+from translation_service import TranslationService, TARGET_LANGUAGES, language_graph
+from work_queue import create_work_queue, WorkQueue
+
+logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+logger = logging.getLogger(__name__)
+
+FEED_SUFFIXES = ('.csv', '.jsonl')
+# CSV 列名 → 字段名
+CSV_COLUMNS = {'id': 'news_id', 'customSubject': 'title', 'customBrief': 'description', 'customBody': 'content'}
+ARTICLE_FIELDS = ('news_id', 'title', 'description', 'content')
+
+# 新闻正文可能超过 csv 模块默认的单字段长度限制
+csv.field_size_limit(sys.maxsize)
+
+
+def normalize_article(item: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """把 CSV 行或 JSON 对象转换为新闻字典，缺少字段时返回 None"""
+    article = {CSV_COLUMNS.get(key, key): value for key, value in item.items()}
+    if any(article.get(field) in (None, '') for field in ARTICLE_FIELDS):
+        return None
+    return {field: str(article[field]) for field in ARTICLE_FIELDS}
+
+
+class FeedWatcher:
+    """采集目录监听类，只处理新增或变化的文件"""
+
+    def __init__(self, path: str, service: Optional[TranslationService], store: Optional[TranslationStore],
+                 target_languages: List[str], queue: Optional[WorkQueue] = None, workers: int = 1,
+                 priority: int = -10, poll_interval: float = 10, settle_seconds: float = 2, seen_max: int = 100000):
+        self.path = path
+        self.service = service
+        self.store = store
+        self.target_languages = target_languages
+        self.queue = queue
+        self.priority = priority
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.seen_max = seen_max
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='feed') if queue is None else None
+        # 文件路径 → (修改时间, 大小)；JSONL 另外记录已读取的字节数，只读取追加的行
+        self._file_states = {}
+        self._offsets = {}
+        # 本进程已翻译或入队成功的 (新闻ID, 原文哈希)，按最近使用顺序最多保留 seen_max 条
+        self._seen = OrderedDict()
+        # 翻译或入队失败、下次轮询重试的新闻
+        self._retry = OrderedDict()
+        self._stopping = threading.Event()
+
+    def _feed_files(self) -> List[str]:
+        if os.path.isdir(self.path):
+            return sorted(
+                os.path.join(self.path, name) for name in os.listdir(self.path)
+                if name.endswith(FEED_SUFFIXES)
+            )
+        return [self.path] if os.path.isfile(self.path) else []
+
+    def _read_jsonl(self, path: str) -> List[Dict[str, str]]:
+        articles = []
+        with open(path, 'rb') as f:
+            f.seek(self._offsets.get(path, 0))
+            data = f.read()
+        # 只处理完整的行，未写完的最后一行留到下次读取
+        complete = data[:data.rfind(b'\n') + 1]
+        self._offsets[path] = self._offsets.get(path, 0) + len(complete)
+        for line in complete.decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            try:
+                article = normalize_article(json.loads(line))
+            except ValueError as e:
+                logger.error(f"无法解析的新闻行 - 文件: {path}, 错误: {str(e)}")
+                continue
+            if article is not None:
+                articles.append(article)
+        return articles
+
+    def _read_csv(self, path: str) -> List[Dict[str, str]]:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return [article for article in map(normalize_article, csv.DictReader(f)) if article is not None]
+
+    @staticmethod
+    def _key(article: Dict[str, str]) -> tuple:
+        return article['news_id'], source_hash(article['title'], article['description'], article['content'])
+
+    def _mark_seen(self, article: Dict[str, str]):
+        key = self._key(article)
+        self._seen[key] = True
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.seen_max:
+            self._seen.popitem(last=False)
+
+    def _mark_failed(self, article: Dict[str, str]):
+        key = self._key(article)
+        self._retry[key] = article
+        while len(self._retry) > self.seen_max:
+            self._retry.popitem(last=False)
+
+    def scan(self) -> List[Dict[str, str]]:
+        """读取新增或变化的文件，返回尚未处理过的新闻（包括上次失败待重试的新闻）"""
+        articles = {}
+        while self._retry:
+            key, article = self._retry.popitem(last=False)
+            articles[key] = article
+        now = time.time()
+        for path in self._feed_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state = (stat.st_mtime, stat.st_size)
+            # 跳过未变化和仍在写入的文件
+            if self._file_states.get(path) == state or now - stat.st_mtime < self.settle_seconds:
+                continue
+            if path.endswith('.jsonl') and stat.st_size < self._offsets.get(path, 0):
+                # 文件被截断或替换，重新读取
+                self._offsets[path] = 0
+            try:
+                new_articles = self._read_jsonl(path) if path.endswith('.jsonl') else self._read_csv(path)
+            except Exception as e:
+                logger.error(f"读取采集文件失败 - 文件: {path}, 错误: {str(e)}")
+                continue
+            self._file_states[path] = state
+
+            for article in new_articles:
+                key = self._key(article)
+                if key in self._seen:
+                    self._seen.move_to_end(key)
+                else:
+                    articles[key] = article
+        return list(articles.values())
+
+    def _missing_languages(self, article: Dict[str, str]) -> List[str]:
+        """存储中还没有当前原文译文的语言"""
+        if self.store is None:
+            return list(self.target_languages)
+        hash_value = source_hash(article['title'], article['description'], article['content'])
+        return [
+            lang for lang in self.target_languages
+            if self.store.get_cached(article['news_id'], lang, hash_value, Config.OPENAI_MODEL) is None
+        ]
+
+    def translate_article(self, article: Dict[str, str], target_languages: List[str]) -> bool:
+        """
+        直接翻译一条新闻并写入存储
+
+        Returns:
+            是否所有语言都翻译成功
+        """
+        if Config.LANGUAGE_DAG_ENABLED:
+            results = self.service.translate_graph(target_languages=target_languages,
+                                                   validate=Config.VALIDATION_ENABLED, **article)
+        else:
+            results = {}
+            for lang in target_languages:
+                result = self.service.translate_content(target_language=lang, **article)
+                if Config.VALIDATION_ENABLED:
+                    result = self.service.validate_and_repair(result, article['title'], article['description'],
+                                                              article['content'])
+                results[lang] = result
+        succeeded = True
+        for result in results.values():
+            if result['status'] != 'success':
+                succeeded = False
+                logger.error(f"预翻译失败 - 新闻ID: {article['news_id']}, 目标语言: {result['target_language']}")
+            elif result.get('validation_errors'):
+                # 保存后不会作为缓存返回，线上请求会重新翻译
+                logger.warning(f"预翻译未通过校验 - 新闻ID: {article['news_id']}, "
+                               f"目标语言: {result['target_language']}")
+            self.store.record(result, Config.OPENAI_MODEL)
+        return succeeded
+
+    def process(self, articles: List[Dict[str, str]]) -> int:
+        """
+        预翻译一批新闻，翻译或入队成功的新闻不再处理，失败的新闻下次轮询重试（只翻译仍缺少的语言）
+
+        Returns:
+            提交翻译的语言数
+        """
+        submitted = 0
+        futures = {}
+        for article in articles:
+            target_languages = self._missing_languages(article)
+            if not target_languages:
+                self._mark_seen(article)
+                continue
+            submitted += len(target_languages)
+            if self.queue is not None:
+                job_id = f'feed-{uuid.uuid4().hex}'
+                if Config.LANGUAGE_DAG_ENABLED:
+                    parents = language_graph(target_languages)
+                else:
+                    parents = dict.fromkeys(target_languages)
+                payloads = {lang: dict(article, target_language=lang) for lang in parents}
+                try:
+                    self.queue.enqueue_graph(job_id, payloads, parents, priority=self.priority)
+                except Exception as e:
+                    logger.error(f"预翻译入队失败 - 新闻ID: {article['news_id']}, 错误: {str(e)}")
+                    self._mark_failed(article)
+                    continue
+                self._mark_seen(article)
+            else:
+                futures[self.executor.submit(self.translate_article, article, target_languages)] = article
+
+        for future, article in futures.items():
+            try:
+                succeeded = future.result()
+            except Exception as e:
+                logger.error(f"预翻译任务失败 - 新闻ID: {article['news_id']}, 错误: {str(e)}")
+                succeeded = False
+            if succeeded:
+                self._mark_seen(article)
+            else:
+                self._mark_failed(article)
+        if self.store is not None:
+            self.store.flush()
+        return submitted
+
+    def run_once(self) -> int:
+        articles = self.scan()
+        if not articles:
+            return 0
+        submitted = self.process(articles)
+        logger.info(f"发现 {len(articles)} 条新闻，提交 {submitted} 个语言翻译")
+        return submitted
+
+    def run(self):
+        logger.info(f"开始监听 {self.path}，目标语言: {self.target_languages}")
+        while not self._stopping.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"预翻译轮询失败: {str(e)}")
+            self._stopping.wait(self.poll_interval)
+        logger.info("预翻译进程已退出")
+
+    def stop(self, *_):
+        """处理完当前一批后退出"""
+        self._stopping.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='采集目录预翻译')
+    parser.add_argument('--path', default=Config.FEED_WATCH_PATH, help='采集目录或文件（CSV/JSONL）')
+    parser.add_argument('--languages', default=Config.FEED_TARGET_LANGUAGES,
+                        help='逗号分隔的目标语言，默认全部')
+    parser.add_argument('--once', action='store_true', help='只处理一次后退出')
+    args = parser.parse_args()
+
+    target_languages = [lang.strip() for lang in args.languages.split(',') if lang.strip()] or list(TARGET_LANGUAGES)
+    unsupported_languages = [lang for lang in target_languages if lang not in TARGET_LANGUAGES]
+    if unsupported_languages:
+        logger.error(f"不支持的目标语言: {unsupported_languages}")
+        return 1
+    if not Config.STORE_ENABLED:
+        logger.error("预翻译结果需要写入存储，请设置 STORE_ENABLED=True")
+        return 1
+
+    store = TranslationStore(
+        Config.STORE_PATH,
+        batch_size=Config.STORE_BATCH_SIZE,
+        flush_interval=Config.STORE_FLUSH_INTERVAL
+    )
+    queue = create_work_queue(
+        Config.WORK_QUEUE_URL,
+        max_attempts=Config.WORK_QUEUE_MAX_ATTEMPTS
+    ) if Config.WORK_QUEUE_ENABLED else None
+    watcher = FeedWatcher(
+        args.path,
+        TranslationService() if queue is None else None,
+        store,
+        target_languages,
+        queue=queue,
+        workers=Config.FEED_WORKERS,
+        priority=Config.FEED_QUEUE_PRIORITY,
+        poll_interval=Config.FEED_POLL_INTERVAL,
+        settle_seconds=0 if args.once else Config.FEED_SETTLE_SECONDS,
+        seen_max=Config.FEED_SEEN_MAX
+    )
+    if args.once:
+        watcher.run_once()
+        return 0
+
+    signal.signal(signal.SIGTERM, watcher.stop)
+    signal.signal(signal.SIGINT, watcher.stop)
+    watcher.run()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
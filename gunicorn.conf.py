@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 生产环境配置
+
+用法：
+    gunicorn -c gunicorn.conf.py app:app
+
+- preload_app：master 进程加载应用并导入 openai 后再 fork，语言配置、提示词模板和已导入的模块
+  通过写时复制在工作进程间共享；模型客户端、线程池和数据库连接由各工作进程首次使用时自行创建
+  代码由 master 加载，kill -HUP 不会加载更新后的代码，更新代码用 USR2 启动新 master 后 TERM 旧 master（见 README）
+- gthread：翻译请求主要在等待模型返回，每个工作进程用多线程处理请求，
+  翻译请求阻塞时 /health、/languages 仍能及时响应
+- max_requests + jitter：工作进程处理一定数量请求后平滑重启，回收内存，错开各进程的重启时间
+- graceful_timeout：重启或退出时等待进行中的翻译完成（客户端超时为 300 秒）
+"""
+import gc
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_class = 'gthread'
+# 开启准入控制时同步翻译请求最多占用 ADMISSION_MAX_REQUESTS（默认 threads - 4）个线程
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '330'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '310'))
+keepalive = 5
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    """应用已预加载、工作进程尚未 fork 时调用"""
+    if not preload_app:
+        return
+    import translation_service
+    translation_service.preload()
+    # 把已有对象移出垃圾回收跟踪，工作进程中的垃圾回收不会写这些对象所在的共享内存页
+    gc.freeze()
+
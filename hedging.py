@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, CancelledError, Future
+from typing import Dict, Any, Optional, Callable
+
+import profiling
+from lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+# 提示词长度档位（字符数），同一语言不同长度的调用耗时差异很大，分开统计
+SIZE_BUCKETS = (1000, 4000, 16000)
+
+
+def hedge_key(target_language: Optional[str], prompt: str) -> str:
+    """按目标语言和提示词长度档位生成统计键"""
+    length = len(prompt)
+    bucket = next((f'<{limit}' for limit in SIZE_BUCKETS if length < limit), f'>={SIZE_BUCKETS[-1]}')
+    return f'{target_language or "unknown"}:{bucket}'
+
+
+class LatencyTracker:
+    """按统计键保留最近的调用耗时，用于计算分位数"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        """样本不足时返回 None"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class HedgeBudget:
+    """对冲请求预算：每次正常调用积累 max_ratio 个额度，每次对冲消耗 1 个，限制额外开销"""
+
+    def __init__(self, max_ratio: float = 0.1, burst: float = 5.0):
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.max_ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class Hedger:
+    """
+    对冲请求类
+
+    调用开始执行后超过该统计键的耗时分位数（如 p95）仍未返回时，再发一个相同的请求，取先完成的结果。
+    同步 HTTP 调用无法中途打断，落后的一方若已开始执行会被放弃（结果丢弃），尚未开始的会被取消，
+    已被线程取出但还未调用的对冲请求发现结果已返回时直接跳过；被放弃的调用由调用方设置的请求超时释放线程。
+    线程池没有空闲线程时不对冲，避免对冲请求排在其他调用之后、加剧积压。
+    """
+
+    def __init__(self, percentile: float = 0.95, min_delay: float = 2.0, max_ratio: float = 0.1,
+                 burst: float = 5.0, window: int = 200, min_samples: int = 20, max_workers: int = 16):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.tracker = LatencyTracker(window=window, min_samples=min_samples)
+        self.budget = HedgeBudget(max_ratio=max_ratio, burst=burst)
+        self.max_workers = max_workers
+        self._executor = Lazy(lambda: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge'))
+        self._stats = defaultdict(int)
+        self._stats_lock = threading.Lock()
+        # 已提交但尚未开始执行的调用数和执行中的调用数
+        self._queued = 0
+        self._running = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        return self._executor.get()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _submit(self, started: threading.Event, settled: Optional[threading.Event], fn: Callable, *args) -> Future:
+        with self._stats_lock:
+            self._queued += 1
+        future = profiling.submit(self.executor, self._timed, started, settled, fn, *args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        # 被取消的调用不会执行 _timed，在这里扣除排队数
+        if future.cancelled():
+            with self._stats_lock:
+                self._queued -= 1
+
+    def _timed(self, started_event: threading.Event, settled: Optional[threading.Event], fn: Callable, *args):
+        with self._stats_lock:
+            self._queued -= 1
+            self._running += 1
+        started_event.set()
+        try:
+            if settled is not None and settled.is_set():
+                # 另一方已经返回结果，不再调用
+                raise CancelledError()
+            started = time.perf_counter()
+            result = fn(*args)
+            if settled is not None:
+                # 在释放线程前标记，同一线程随后取出的对冲请求能看到
+                settled.set()
+            return result, time.perf_counter() - started
+        finally:
+            with self._stats_lock:
+                self._running -= 1
+
+    def idle_workers(self) -> int:
+        """线程池中的空闲线程数"""
+        with self._stats_lock:
+            return self.max_workers - self._running - self._queued
+
+    def threshold(self, key: str) -> Optional[float]:
+        """当前对冲等待阈值，样本不足时不对冲"""
+        value = self.tracker.percentile(key, self.percentile)
+        if value is None:
+            return None
+        return max(value, self.min_delay)
+
+    def call(self, key: str, fn: Callable, *args) -> Any:
+        """
+        执行可能被对冲的调用
+
+        Args:
+            key: 统计键，见 hedge_key
+            fn: 实际调用
+            *args: 调用参数
+
+        Returns:
+            先成功完成的调用结果；两次都失败时抛出主请求的异常
+        """
+        self._count('calls')
+        self.budget.earn()
+        threshold = self.threshold(key)
+
+        primary_started = threading.Event()
+        # 主请求或对冲请求任一成功返回后置位
+        settled = threading.Event()
+        primary = self._submit(primary_started, settled, fn, *args)
+        if threshold is None:
+            result, elapsed = primary.result()
+            self.tracker.record(key, elapsed)
+            return result
+
+        # 阈值从主请求开始执行时计时，线程池排队时间不计入
+        primary_started.wait()
+        done, _ = wait([primary], timeout=threshold)
+        if primary not in done:
+            if self.idle_workers() <= 0:
+                self._count('busy_skipped')
+            elif not self.budget.try_spend():
+                self._count('budget_denied')
+            else:
+                return self._hedge(key, threshold, primary, settled, fn, *args)
+        result, elapsed = primary.result()
+        self.tracker.record(key, elapsed)
+        return result
+
+    def _hedge(self, key: str, threshold: float, primary: Future, settled: threading.Event, fn: Callable,
+               *args) -> Any:
+        """发出对冲请求，返回主请求和对冲请求中先成功的结果"""
+        self._count('hedged')
+        logger.info(f"发出对冲请求 - 统计键: {key}, 阈值: {threshold:.2f}s")
+        hedge = self._submit(threading.Event(), settled, fn, *args)
+        pending = {primary, hedge}
+        primary_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    if future is primary:
+                        primary_error = e
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is hedge:
+                    self._count('hedge_wins')
+                    # 主请求耗时已知至少为阈值加对冲耗时
+                    self.tracker.record(key, threshold + elapsed)
+                else:
+                    self.tracker.record(key, elapsed)
+                return result
+
+        # 两次都失败
+        raise primary_error
+
+    def stats(self) -> Dict[str, Any]:
+        """对冲统计：对冲率为对冲次数/调用次数，胜率为对冲请求先完成的比例"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        calls = stats.get('calls', 0)
+        hedged = stats.get('hedged', 0)
+        return {
+            'calls': calls,
+            'hedged': hedged,
+            'hedge_wins': stats.get('hedge_wins', 0),
+            'budget_denied': stats.get('budget_denied', 0),
+            'busy_skipped': stats.get('busy_skipped', 0),
+            'hedge_rate': round(hedged / calls, 4) if calls else 0.0,
+            'hedge_win_rate': round(stats.get('hedge_wins', 0) / hedged, 4) if hedged else 0.0
+        }
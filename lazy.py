@@ -0,0 +1,50 @@
+import os
+import threading
+import weakref
+from typing import Any, Callable
+
+
+def reset_after_fork(obj: Any, method_name: str):
+    """
+    在 fork 出的子进程中调用 obj 的指定方法，用于丢弃从父进程复制来的线程、连接等进程内资源
+
+    只保存弱引用，不影响对象回收。
+    """
+    if not hasattr(os, 'register_at_fork'):
+        return
+    ref = weakref.ref(obj)
+
+    def callback():
+        target = ref()
+        if target is not None:
+            getattr(target, method_name)()
+
+    os.register_at_fork(after_in_child=callback)
+
+
+class Lazy:
+    """
+    按需创建的进程内资源（模型客户端、线程池等）
+
+    首次 get() 时才创建。gunicorn preload_app 时应用在 master 进程加载，
+    fork 出的工作进程会丢弃父进程中已创建的实例，在自己的进程内重新创建。
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+        reset_after_fork(self, '_reset')
+
+    def _reset(self):
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        value = self._value
+        if value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self.factory()
+                value = self._value
+        return value
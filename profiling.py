@@ -0,0 +1,216 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+_current_timer = contextvars.ContextVar('request_timer', default=None)
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestTimer:
+    """单个请求的耗时统计类，同名阶段累加耗时和次数（多线程安全）"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            total, count = self._spans.get(name, (0.0, 0))
+            self._spans[name] = (total + seconds, count + 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        返回耗时统计
+
+        并行执行的阶段（如多语言同时调用模型）耗时是各线程之和，可能大于 total_ms。
+        """
+        with self._lock:
+            spans = {
+                name: {'ms': round(total * 1000, 2), 'count': count}
+                for name, (total, count) in self._spans.items()
+            }
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'spans': spans
+        }
+
+    def server_timing(self) -> str:
+        """生成 Server-Timing 响应头"""
+        timing = self.as_dict()
+        parts = [f"{name};dur={span['ms']}" for name, span in timing['spans'].items()]
+        parts.append(f"total;dur={timing['total_ms']}")
+        return ', '.join(parts)
+
+
+def start_timer() -> contextvars.Token:
+    """为当前请求开启耗时统计，返回用于 stop_timer 的 token"""
+    return _current_timer.set(RequestTimer())
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current_timer.get()
+
+
+def stop_timer(token: contextvars.Token):
+    _current_timer.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """统计一个阶段的耗时，未开启统计时不做任何事"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def submit(executor: Executor, fn, *args, **kwargs) -> Future:
+    """
+    向线程池提交任务，并把当前请求的耗时统计和采样分析带到工作线程
+
+    排队等待的时间记为 queue 阶段。
+    """
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def run():
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.add('queue', time.perf_counter() - submitted)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.attach()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.detach()
+
+    return executor.submit(context.run, run)
+
+
+class RequestProfile:
+    """单个请求的调用栈采样结果"""
+
+    def __init__(self, profiler: 'SamplingProfiler', name: str):
+        self.profiler = profiler
+        self.name = name
+        self.started = time.perf_counter()
+        self.samples = Counter()
+
+    def attach(self):
+        """开始采样当前线程"""
+        self.profiler.register(threading.get_ident(), self)
+
+    def detach(self):
+        self.profiler.unregister(threading.get_ident())
+
+    def snapshot(self) -> Counter:
+        """
+        当前采样结果的副本
+
+        请求结束后线程池中的子任务可能仍登记在采样线程中，采样线程在 profiler 的锁内累加，这里同样在锁内复制。
+        """
+        with self.profiler._lock:
+            return self.samples.copy()
+
+    def dump(self, directory: str) -> str:
+        """
+        以 flamegraph.pl / speedscope 可读取的折叠栈格式写入文件
+
+        Returns:
+            文件路径
+        """
+        os.makedirs(directory, exist_ok=True)
+        elapsed_ms = int((time.perf_counter() - self.started) * 1000)
+        safe_name = ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in self.name)
+        path = os.path.join(directory, f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{safe_name}_{elapsed_ms}ms.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.snapshot().most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class SamplingProfiler:
+    """采样分析类：后台线程定时采集已登记线程的调用栈"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name='sampling-profiler', daemon=True)
+                self._thread.start()
+
+    def register(self, ident: int, profile: RequestProfile):
+        self._ensure_thread()
+        with self._lock:
+            self._targets[ident] = profile
+
+    def unregister(self, ident: int):
+        with self._lock:
+            self._targets.pop(ident, None)
+
+    def start_request(self, name: str) -> contextvars.Token:
+        """为当前请求开启采样，返回用于 finish_request 的 token"""
+        profile = RequestProfile(self, name)
+        profile.attach()
+        return _current_profile.set(profile)
+
+    def finish_request(self, token: contextvars.Token) -> Optional[RequestProfile]:
+        """结束当前请求的采样并返回采样结果"""
+        profile = _current_profile.get()
+        _current_profile.reset(token)
+        if profile is not None:
+            profile.detach()
+        return profile
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._targets:
+                    continue
+                targets = list(self._targets.items())
+            frames = sys._current_frames()
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            collected = [
+                (profile, self._collapse(frames[ident], thread_names.get(ident, str(ident))))
+                for ident, profile in targets if ident in frames
+            ]
+            # 在锁内累加，与 RequestProfile.snapshot 互斥
+            with self._lock:
+                for profile, stack in collected:
+                    profile.samples[stack] += 1
+
+    @staticmethod
+    def _collapse(frame, thread_name: str) -> str:
+        """把调用栈折叠为 "线程;外层函数;...;内层函数" 格式"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        # 线程池线程名形如 headline_3，去掉序号以便同一线程池的栈合并
+        prefix, _, suffix = thread_name.rpartition('_')
+        stack.append(prefix if prefix and suffix.isdigit() else thread_name)
+        return ';'.join(reversed(stack))
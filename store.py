@@ -0,0 +1,215 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from lazy import reset_after_fork
+
+logger = logging.getLogger(__name__)
+
+
+def source_hash(title: str, description: str, content: str) -> str:
+    """计算原文哈希，用于判断已保存的译文是否对应当前原文"""
+    digest = hashlib.sha256()
+    for part in (title, description, content):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class TranslationStore:
+    """翻译结果持久化存储类（SQLite WAL，后台线程批量写入）"""
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS translations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            news_id TEXT NOT NULL,
+            target_language TEXT NOT NULL,
+            language_code TEXT NOT NULL,
+            source_hash TEXT NOT NULL,
+            model TEXT NOT NULL,
+            status TEXT NOT NULL,
+            title TEXT,
+            description TEXT,
+            content TEXT,
+            raw_translation TEXT,
+            validation_errors TEXT,
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_translations_news
+            ON translations (news_id, target_language, id);
+        CREATE INDEX IF NOT EXISTS idx_translations_source
+            ON translations (news_id, target_language, source_hash, model);
+    '''
+
+    def __init__(self, db_path: str, batch_size: int = 50, flush_interval: float = 1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(self.SCHEMA)
+        # 旧版本创建的数据库没有校验结果字段
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(translations)')}
+        if 'validation_errors' not in columns:
+            conn.execute('ALTER TABLE translations ADD COLUMN validation_errors TEXT')
+        conn.close()
+        reset_after_fork(self, '_after_fork')
+
+    def _after_fork(self):
+        """子进程不能复用父进程的连接和写线程，首次使用时重新创建"""
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """每个线程使用独立的只读连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _ensure_writer(self):
+        """首次写入时启动后台写线程"""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='store-writer', daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def record(self, result: Dict[str, Any], model: str):
+        """
+        记录一条翻译结果（异步写入，不阻塞请求）
+
+        Args:
+            result: TranslationService 返回的翻译结果字典，失败的结果会被忽略；
+                未通过校验的字段（validation_errors）一并保存，这类结果不会作为缓存返回
+            model: 使用的模型
+        """
+        if result.get('status') not in ('success', 'success_raw'):
+            return
+        validation_errors = result.get('validation_errors')
+        row = (
+            str(result['news_id']),
+            result['target_language'],
+            result['language_code'],
+            source_hash(result.get('original_title', ''),
+                        result.get('original_description', ''),
+                        result.get('original_content', '')),
+            model,
+            result['status'],
+            result.get('translated_title'),
+            result.get('translated_description'),
+            result.get('translated_content'),
+            result.get('raw_translation'),
+            json.dumps(validation_errors, ensure_ascii=False) if validation_errors else None,
+            result.get('timestamp') or datetime.now().isoformat()
+        )
+        self._ensure_writer()
+        self._queue.put(row)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(
+                        'INSERT INTO translations (news_id, target_language, language_code, source_hash, model, '
+                        'status, title, description, content, raw_translation, validation_errors, created_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        batch
+                    )
+            except Exception as e:
+                logger.error(f"翻译结果写入失败, 条数: {len(batch)}, 错误: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """等待队列中的结果全部写入"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def get_by_news_id(self, news_id: str, target_language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        查询某条新闻每种语言最新的翻译结果
+
+        Args:
+            news_id: 新闻ID
+            target_language: 目标语言代码（可选）
+
+        Returns:
+            翻译记录列表
+        """
+        sql = '''
+            SELECT * FROM translations
+            WHERE id IN (
+                SELECT MAX(id) FROM translations
+                WHERE news_id = ?{language_filter}
+                GROUP BY target_language
+            )
+            ORDER BY target_language
+        '''
+        params = [str(news_id)]
+        language_filter = ''
+        if target_language:
+            language_filter = ' AND target_language = ?'
+            params.append(target_language)
+        rows = self._reader().execute(sql.format(language_filter=language_filter), params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_cached(self, news_id: str, target_language: str, hash_value: str, model: str) -> Optional[Dict[str, Any]]:
+        """
+        查询与当前原文和模型一致、且通过校验的最新成功译文，用于直接返回缓存结果
+
+        Args:
+            news_id: 新闻ID
+            target_language: 目标语言代码
+            hash_value: 原文哈希，见 source_hash
+            model: 使用的模型
+
+        Returns:
+            翻译记录，未找到时返回 None
+        """
+        row = self._reader().execute(
+            "SELECT * FROM translations "
+            "WHERE news_id = ? AND target_language = ? AND source_hash = ? AND model = ? AND status = 'success' "
+            "AND validation_errors IS NULL ORDER BY id DESC LIMIT 1",
+            (str(news_id), target_language, hash_value, model)
+        ).fetchone()
+        return dict(row) if row is not None else None
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试脚本：本地 Batch API 模拟服务，用于离线验证 backfill.py
+
+实现 /v1/files、/v1/batches 和 /v1/files/{id}/content 接口。每次查询 batch 状态会推进一步
+（validating → in_progress → completed），完成时把每个请求的标题/描述/正文加上 [目标语言] 前缀
+作为“译文”返回；标题中包含 FAIL 的请求会写入错误文件，用于验证逐条错误处理。
+
+用法：
+    python batch_stub_server.py [端口]
+    OPENAI_BASE_URL=http://localhost:8700/v1 OPENAI_API_KEY=test python ../backfill.py run news.jsonl --poll-interval 1
+"""
+import json
+import re
+import sys
+import time
+import uuid
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILES = {}
+BATCHES = {}
+BATCH_STEPS = ['validating', 'in_progress', 'completed']
+
+
+def new_file(content: bytes, filename: str, purpose: str) -> dict:
+    file_id = f'file-{uuid.uuid4().hex[:12]}'
+    FILES[file_id] = {
+        'content': content,
+        'meta': {
+            'id': file_id,
+            'object': 'file',
+            'bytes': len(content),
+            'created_at': int(time.time()),
+            'filename': filename,
+            'purpose': purpose,
+            'status': 'processed'
+        }
+    }
+    return FILES[file_id]['meta']
+
+
+def fake_translate(custom_id: str, body: dict) -> str:
+    """从提示词中取出原文，加上目标语言前缀作为译文"""
+    lang = custom_id.rsplit('::', 1)[-1]
+    prompt = body['messages'][0]['content']
+    fields = {}
+    for key, label in (('title', '标题'), ('description', '描述'), ('content', '正文')):
+        match = re.search(rf'^{label}：(.*)$', prompt, re.MULTILINE)
+        fields[key] = f'[{lang}] {match.group(1) if match else ""}'
+    return '```json\n' + json.dumps(fields, ensure_ascii=False) + '\n```'
+
+
+def run_batch(batch: dict):
+    """生成 batch 的输出文件和错误文件"""
+    outputs, errors = [], []
+    for line in FILES[batch['input_file_id']]['content'].decode('utf-8').splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if 'FAIL' in item['body']['messages'][0]['content'].split('标题：', 1)[-1].split('\n', 1)[0]:
+            errors.append({
+                'id': f'batch_req_{uuid.uuid4().hex[:8]}',
+                'custom_id': item['custom_id'],
+                'response': {'status_code': 500, 'body': {'error': {'message': '模拟失败'}}},
+                'error': None
+            })
+            continue
+        outputs.append({
+            'id': f'batch_req_{uuid.uuid4().hex[:8]}',
+            'custom_id': item['custom_id'],
+            'response': {
+                'status_code': 200,
+                'body': {'choices': [{'index': 0, 'message': {'role': 'assistant',
+                                                              'content': fake_translate(item['custom_id'], item['body'])}}]}
+            },
+            'error': None
+        })
+
+    def to_bytes(items):
+        return ''.join(json.dumps(i, ensure_ascii=False) + '\n' for i in items).encode('utf-8')
+
+    batch['output_file_id'] = new_file(to_bytes(outputs), 'output.jsonl', 'batch_output')['id'] if outputs else None
+    batch['error_file_id'] = new_file(to_bytes(errors), 'errors.jsonl', 'batch_output')['id'] if errors else None
+    batch['request_counts'] = {'total': len(outputs) + len(errors), 'completed': len(outputs), 'failed': len(errors)}
+    batch['completed_at'] = int(time.time())
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    """Batch API 模拟处理类"""
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_POST(self):
+        if self.path == '/v1/files':
+            raw = self._read_body()
+            message = BytesParser(policy=policy.default).parsebytes(
+                b'Content-Type: ' + self.headers['Content-Type'].encode('utf-8') + b'\r\n\r\n' + raw
+            )
+            content, filename, purpose = b'', 'input.jsonl', 'batch'
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                if name == 'file':
+                    content = part.get_payload(decode=True)
+                    filename = part.get_filename() or filename
+                elif name == 'purpose':
+                    purpose = part.get_content().strip()
+            self._send_json(new_file(content, filename, purpose))
+        elif self.path == '/v1/batches':
+            data = json.loads(self._read_body())
+            batch_id = f'batch_{uuid.uuid4().hex[:12]}'
+            BATCHES[batch_id] = {
+                'id': batch_id,
+                'object': 'batch',
+                'endpoint': data['endpoint'],
+                'input_file_id': data['input_file_id'],
+                'completion_window': data['completion_window'],
+                'metadata': data.get('metadata'),
+                'status': BATCH_STEPS[0],
+                'created_at': int(time.time()),
+                'output_file_id': None,
+                'error_file_id': None
+            }
+            print(f"创建 batch {batch_id}")
+            self._send_json(BATCHES[batch_id])
+        else:
+            self._send_json({'error': {'message': 'not found'}}, 404)
+
+    def do_GET(self):
+        match = re.fullmatch(r'/v1/batches/([\w-]+)', self.path)
+        if match and match.group(1) in BATCHES:
+            batch = BATCHES[match.group(1)]
+            step = BATCH_STEPS.index(batch['status'])
+            if step < len(BATCH_STEPS) - 1:
+                batch['status'] = BATCH_STEPS[step + 1]
+                if batch['status'] == 'completed':
+                    run_batch(batch)
+            self._send_json(batch)
+            return
+
+        match = re.fullmatch(r'/v1/files/([\w-]+)/content', self.path)
+        if match and match.group(1) in FILES:
+            content = FILES[match.group(1)]['content']
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+
+        self._send_json({'error': {'message': 'not found'}}, 404)
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8700
+    print(f"Batch API 模拟服务已启动: http://localhost:{port}/v1")
+    ThreadingHTTPServer(('0.0.0.0', port), BatchHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
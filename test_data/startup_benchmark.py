@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试脚本：测量服务冷启动时间和 gunicorn 各工作进程的内存占用
+
+- 冷启动：多次在新进程中 import app（创建应用），以及启动 gunicorn 到 /health 可访问的时间
+- 内存：读取 /proc/<pid>/smaps_rollup，RSS 为进程常驻内存，PSS 按共享进程数分摊共享页，
+  Shared 为与其他进程共享的页（preload_app 时工作进程与 master 共享的部分），Private 为进程独占
+- 分别在空闲时和处理过翻译请求后（导入 openai、创建模型客户端和线程池）测量，
+  翻译请求发到本脚本启动的模拟模型接口，不调用真实模型
+
+只支持 Linux。用法：
+    python startup_benchmark.py                 # preload 与非 preload 对比
+    python startup_benchmark.py --workers 4 --runs 5
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeCompletionHandler(BaseHTTPRequestHandler):
+    """模拟 /v1/chat/completions，固定返回一条译文"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        content = '```json\n' + json.dumps({'title': 't', 'description': 'd', 'content': 'c'}) + '\n```'
+        body = json.dumps({
+            'id': 'chatcmpl-benchmark', 'object': 'chat.completion', 'created': int(time.time()), 'model': 'stub',
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}]
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure_import(runs: int) -> dict:
+    """在新进程中 import app 的耗时（秒）"""
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import app'], cwd=PROJECT_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - started)
+    baseline = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        baseline.append(time.perf_counter() - started)
+    return {
+        'import_app_median_s': round(statistics.median(durations), 3),
+        'python_startup_median_s': round(statistics.median(baseline), 3)
+    }
+
+
+def memory_kb(pid: int) -> dict:
+    """读取进程内存统计（KB）"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'shared': values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0),
+        'private': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    }
+
+
+def child_pids(pid: int) -> list:
+    pids = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            pids.extend(int(child) for child in f.read().split())
+    return sorted(pids)
+
+
+def wait_ready(url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def warm_up(base_url: str, requests_per_worker: int, workers: int):
+    """让各工作进程处理翻译请求（请求分配到哪个进程由内核决定，多发几次尽量覆盖所有进程）"""
+    for i in range(requests_per_worker * workers):
+        urllib.request.urlopen(f'{base_url}/languages', timeout=5).read()
+        payload = {'news_id': f'benchmark-{i}', 'title': 'title', 'description': 'description',
+                   'content': 'content', 'target_languages': ['en', 'ja'], 'split_mode': i % 2 == 1}
+        request = urllib.request.Request(f'{base_url}/translate/multi', data=json.dumps(payload).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        urllib.request.urlopen(request, timeout=30).read()
+
+
+def measure_gunicorn(workers: int, preload: bool, port: int, warm: bool, model_url: str) -> dict:
+    env = dict(os.environ, GUNICORN_WORKERS=str(workers), GUNICORN_PRELOAD=str(preload),
+               GUNICORN_ACCESS_LOG='/dev/null', HOST='127.0.0.1', PORT=str(port),
+               OPENAI_BASE_URL=model_url, OPENAI_API_KEY='benchmark', VALIDATION_ENABLED='False',
+               CACHE_ENABLED='False', STORE_PATH=os.path.join('/tmp', f'startup_benchmark_{port}.db'))
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        if not wait_ready(f'{base_url}/health', timeout=60):
+            raise RuntimeError('gunicorn 启动超时')
+        ready_s = time.perf_counter() - started
+        # 等所有工作进程启动
+        deadline = time.monotonic() + 30
+        while len(child_pids(process.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+        time.sleep(1)
+        if warm:
+            warm_up(base_url, 5, workers)
+            time.sleep(0.5)
+
+        master = memory_kb(process.pid)
+        worker_memory = [memory_kb(pid) for pid in child_pids(process.pid)]
+        return {
+            'preload': preload,
+            'warm': warm,
+            'workers': len(worker_memory),
+            'ready_s': round(ready_s, 3),
+            'master_rss_mb': round(master['rss'] / 1024, 1),
+            'worker_rss_mb': round(statistics.mean(m['rss'] for m in worker_memory) / 1024, 1),
+            'worker_pss_mb': round(statistics.mean(m['pss'] for m in worker_memory) / 1024, 1),
+            'worker_shared_mb': round(statistics.mean(m['shared'] for m in worker_memory) / 1024, 1),
+            'worker_private_mb': round(statistics.mean(m['private'] for m in worker_memory) / 1024, 1),
+            'total_pss_mb': round((master['pss'] + sum(m['pss'] for m in worker_memory)) / 1024, 1)
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动与工作进程内存测试')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn 工作进程数')
+    parser.add_argument('--runs', type=int, default=5, help='import 测试次数')
+    parser.add_argument('--port', type=int, default=8590, help='gunicorn 测试端口')
+    args = parser.parse_args()
+
+    model_server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCompletionHandler)
+    threading.Thread(target=model_server.serve_forever, daemon=True).start()
+    model_url = f'http://127.0.0.1:{model_server.server_port}/v1'
+
+    print(json.dumps(measure_import(args.runs), ensure_ascii=False))
+    for preload in (True, False):
+        for warm in (False, True):
+            result = measure_gunicorn(args.workers, preload, args.port, warm, model_url)
+            print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
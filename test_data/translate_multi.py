@@ -72,7 +72,9 @@ def call_translate_multi_api(news_data: Dict[str, Any], target_languages: List[s
         # 发送POST请求
         headers = {
             'Content-Type': 'application/json',
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            # 与下面的超时一致，服务繁忙预计超时时直接返回503
+            'X-Deadline-Seconds': '300'
         }
         
         response = requests.post(
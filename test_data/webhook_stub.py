@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试脚本：本地回调接收服务，用于验证 /translate/multi 的 callback_url 推送
+
+用法：
+    WEBHOOK_SECRET=xxx python webhook_stub.py [端口] [前N次请求返回500]
+
+翻译服务需设置 WEBHOOK_ALLOWED_HOSTS=localhost（默认不允许回调到本机），
+然后在请求 /translate/multi 时传入 "callback_url": "http://localhost:8600/callback"
+"""
+import hashlib
+import hmac
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+SECRET = os.getenv('WEBHOOK_SECRET')
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """打印收到的回调并校验签名"""
+
+    fail_first = 0
+    received = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        CallbackHandler.received += 1
+
+        # 模拟接收方故障，验证重试
+        if CallbackHandler.received <= CallbackHandler.fail_first:
+            print(f"第 {CallbackHandler.received} 次请求，模拟返回500")
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        timestamp = self.headers.get('X-Webhook-Timestamp', '')
+        signature = self.headers.get('X-Webhook-Signature', '')
+        if SECRET:
+            expected = 'sha256=' + hmac.new(SECRET.encode('utf-8'), timestamp.encode('utf-8') + b'.' + body,
+                                            hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, signature):
+                print("签名校验失败")
+                self.send_response(401)
+                self.end_headers()
+                return
+
+        payload = json.loads(body)
+        print(f"收到回调 事件: {payload.get('event')}, 新闻ID: {payload.get('news_id')}, "
+              f"状态: {payload.get('status')}, 第{self.headers.get('X-Webhook-Attempt')}次尝试")
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+
+        self.send_response(200)
+        self.end_headers()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8600
+    CallbackHandler.fail_first = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    print(f"回调接收服务已启动: http://localhost:{port}/callback")
+    print(f"签名校验: {'开启' if SECRET else '关闭'}")
+    HTTPServer(('0.0.0.0', port), CallbackHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+from config import Config, LanguageConfig
+from validation import extract_translation_json, validate_translation, TRANSLATION_FIELDS
+import profiling
+from hedging import Hedger, hedge_key
+from admission import AdmissionController
+from lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+# 获取语言配置
+TARGET_LANGUAGES = LanguageConfig.get_target_languages()
+
+
+def preload():
+    """
+    提前导入模型客户端依赖（openai 导入耗时占启动时间的大部分）
+
+    直接运行时在首次翻译时才导入；gunicorn preload_app 时在 master 进程调用，
+    工作进程 fork 后通过写时复制共享已导入的模块，不必各自导入。
+    """
+    import openai  # noqa: F401
+
+
+def _create_client():
+    import openai
+    return openai.OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL)
+
+
+def language_graph(target_languages: List[str]) -> Dict[str, Optional[str]]:
+    """
+    本次请求内的语言依赖关系
+
+    父语言不在本次请求中，或配置存在循环依赖时，该语言没有父语言（从原文翻译）。
+
+    Returns:
+        {目标语言代码: 父语言代码或 None}，按依赖顺序排列，父语言在派生语言之前
+    """
+    requested = list(dict.fromkeys(target_languages))
+    parents = {}
+    for lang in requested:
+        parent = TARGET_LANGUAGES[lang].get('derive_from', {}).get('language')
+        parents[lang] = parent if parent in requested and parent != lang else None
+
+    # 按依赖顺序排列，剩下的属于循环依赖
+    ordered = {}
+    changed = True
+    while changed:
+        changed = False
+        for lang in requested:
+            if lang not in ordered and (parents[lang] is None or parents[lang] in ordered):
+                ordered[lang] = parents[lang]
+                changed = True
+    for lang in requested:
+        if lang not in ordered:
+            logger.warning(f"语言依赖存在循环，{lang} 改为从原文翻译")
+            ordered[lang] = None
+    return ordered
+
+
+class TranslationService:
+    """翻译服务类（模型客户端和线程池在首次使用时于当前进程内创建）"""
+
+    def __init__(self):
+        self._client = Lazy(_create_client)
+        # 标题/描述快速通道与正文使用独立线程池，避免短请求排在长正文之后
+        self._headline_executor = Lazy(lambda: ThreadPoolExecutor(max_workers=Config.HEADLINE_WORKERS,
+                                                                   thread_name_prefix='headline'))
+        self._body_executor = Lazy(lambda: ThreadPoolExecutor(max_workers=Config.BODY_WORKERS,
+                                                              thread_name_prefix='body'))
+        # 语言依赖图调度线程池
+        self._graph_executor = Lazy(lambda: ThreadPoolExecutor(max_workers=Config.LANGUAGE_DAG_WORKERS,
+                                                               thread_name_prefix='graph'))
+        # 对冲请求（可选）：慢调用超过耗时分位数后再发一次，取先返回的结果
+        self.hedger = Hedger(
+            percentile=Config.HEDGE_PERCENTILE,
+            min_delay=Config.HEDGE_MIN_DELAY,
+            max_ratio=Config.HEDGE_MAX_RATIO,
+            burst=Config.HEDGE_BURST,
+            window=Config.HEDGE_WINDOW,
+            min_samples=Config.HEDGE_MIN_SAMPLES,
+            max_workers=Config.HEDGE_WORKERS
+        ) if Config.HEDGE_ENABLED else None
+        # 准入控制（可选）：统计模型调用并发数和耗时，供 API 进程估算排队时间
+        self.admission = AdmissionController(
+            capacity=Config.ADMISSION_CAPACITY,
+            max_pending_calls=Config.ADMISSION_MAX_PENDING_CALLS,
+            initial_latency=Config.ADMISSION_INITIAL_LATENCY,
+            alpha=Config.ADMISSION_EWMA_ALPHA,
+            max_requests=Config.ADMISSION_MAX_REQUESTS,
+            max_queued_tasks=Config.ADMISSION_MAX_QUEUED_TASKS
+        ) if Config.ADMISSION_ENABLED else None
+
+    @property
+    def client(self):
+        return self._client.get()
+
+    @property
+    def headline_executor(self) -> ThreadPoolExecutor:
+        return self._headline_executor.get()
+
+    @property
+    def body_executor(self) -> ThreadPoolExecutor:
+        return self._body_executor.get()
+
+    @property
+    def graph_executor(self) -> ThreadPoolExecutor:
+        return self._graph_executor.get()
+
+    def _complete(self, prompt: str, max_tokens: int = None, target_language: str = None) -> str:
+        """调用模型并返回文本结果，开启对冲时按目标语言和提示词长度统计耗时"""
+        if self.admission is not None:
+            with self.admission.track():
+                return self._call_model(prompt, max_tokens, target_language)
+        return self._call_model(prompt, max_tokens, target_language)
+
+    def _call_model(self, prompt: str, max_tokens: int = None, target_language: str = None) -> str:
+        if self.hedger is None:
+            return self._request_completion(prompt, max_tokens)
+        # 对冲时落后的调用结果会被丢弃，设置请求超时使其尽早释放线程
+        return self.hedger.call(hedge_key(target_language, prompt), self._request_completion, prompt, max_tokens,
+                                Config.HEDGE_REQUEST_TIMEOUT)
+
+    def _request_completion(self, prompt: str, max_tokens: int = None, timeout: float = None) -> str:
+        """实际调用模型，timeout 为空时使用客户端默认超时"""
+        options = {'timeout': timeout} if timeout else {}
+        with profiling.span('openai'):
+            response = self.client.chat.completions.create(
+                model=Config.OPENAI_MODEL,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=Config.OPENAI_TEMPERATURE,
+                max_tokens=max_tokens or Config.OPENAI_MAX_TOKENS,
+                **options
+            )
+        return response.choices[0].message.content
+
+    @staticmethod
+    def _build_result(news_id: str, target_language: str, translated: Dict[str, Any],
+                      title: str, description: str, content: str) -> Dict[str, Any]:
+        """构建翻译成功的结果字典"""
+        language_config = TARGET_LANGUAGES[target_language]
+        return {
+            'news_id': news_id,
+            'target_language': target_language,
+            'language_name': language_config['name'],
+            'language_code': language_config['code'],
+            'translated_title': translated.get('title', ''),
+            'translated_description': translated.get('description', ''),
+            'translated_content': translated.get('content', ''),
+            'original_title': title,
+            'original_description': description,
+            'original_content': content,
+            'timestamp': datetime.now().isoformat(),
+            'status': 'success'
+        }
+
+    def translate_content(self, news_id: str, title: str, description: str, content: str, target_language: str) -> Dict[
+        str, Any]:
+        """
+        翻译内容到指定目标语言
+        
+        Args:
+            news_id: 新闻ID
+            title: 标题
+            description: 描述
+            content: 正文
+            target_language: 目标语言代码
+            
+        Returns:
+            翻译结果字典
+        """
+        if target_language not in TARGET_LANGUAGES:
+            raise ValueError(f"不支持的目标语言: {target_language}")
+
+        language_config = TARGET_LANGUAGES[target_language]
+        with profiling.span('prompt'):
+            prompt = language_config['prompt_template'].format(
+                title=title,
+                description=description,
+                content=content
+            )
+
+        try:
+            translation_result = self._complete(prompt, target_language=target_language)
+
+            # 尝试解析JSON响应
+            with profiling.span('json'):
+                parsed_result = extract_translation_json(translation_result)
+            if parsed_result is not None:
+                return self._build_result(news_id, target_language, parsed_result, title, description, content)
+
+            # 如果无法解析JSON，返回原始响应
+            return {
+                'news_id': news_id,
+                'target_language': target_language,
+                'language_name': language_config['name'],
+                'language_code': language_config['code'],
+                'raw_translation': translation_result,
+                'original_title': title,
+                'original_description': description,
+                'original_content': content,
+                'timestamp': datetime.now().isoformat(),
+                'status': 'success_raw'
+            }
+
+        except Exception as e:
+            logger.error(f"翻译失败 - 新闻ID: {news_id}, 目标语言: {target_language}, 错误: {str(e)}")
+            return {
+                'news_id': news_id,
+                'target_language': target_language,
+                'language_name': language_config['name'],
+                'language_code': language_config['code'],
+                'error': str(e),
+                'timestamp': datetime.now().isoformat(),
+                'status': 'error'
+            }
+
+    def translate_headline(self, news_id: str, title: str, description: str, target_language: str) -> Dict[str, Any]:
+        """
+        只翻译标题和描述（快速通道）
+
+        Args:
+            news_id: 新闻ID
+            title: 标题
+            description: 描述
+            target_language: 目标语言代码
+
+        Returns:
+            翻译结果字典，不包含正文
+        """
+        if target_language not in TARGET_LANGUAGES:
+            raise ValueError(f"不支持的目标语言: {target_language}")
+
+        language_config = TARGET_LANGUAGES[target_language]
+        with profiling.span('prompt'):
+            prompt = LanguageConfig.build_fields_prompt(language_config, {
+                'title': title,
+                'description': description
+            })
+
+        try:
+            translation_result = self._complete(prompt, max_tokens=Config.HEADLINE_MAX_TOKENS,
+                                                target_language=target_language)
+            with profiling.span('json'):
+                parsed_result = extract_translation_json(translation_result)
+            if parsed_result is None:
+                raise ValueError('无法解析译文JSON')
+            return {
+                'news_id': news_id,
+                'target_language': target_language,
+                'language_name': language_config['name'],
+                'language_code': language_config['code'],
+                'translated_title': parsed_result.get('title', ''),
+                'translated_description': parsed_result.get('description', ''),
+                'original_title': title,
+                'original_description': description,
+                'timestamp': datetime.now().isoformat(),
+                'status': 'success'
+            }
+        except Exception as e:
+            logger.error(f"标题翻译失败 - 新闻ID: {news_id}, 目标语言: {target_language}, 错误: {str(e)}")
+            return {
+                'news_id': news_id,
+                'target_language': target_language,
+                'language_name': language_config['name'],
+                'language_code': language_config['code'],
+                'error': str(e),
+                'timestamp': datetime.now().isoformat(),
+                'status': 'error'
+            }
+
+    def retranslate_fields(self, target_language: str, fields: Dict[str, str]) -> Dict[str, Any]:
+        """
+        只重新翻译指定字段
+
+        Args:
+            target_language: 目标语言代码
+            fields: 需要重新翻译的原文字段
+
+        Returns:
+            解析后的译文字段
+        """
+        prompt = LanguageConfig.build_fields_prompt(TARGET_LANGUAGES[target_language], fields)
+        max_tokens = None if 'content' in fields else Config.HEADLINE_MAX_TOKENS
+        translation_result = self._complete(prompt, max_tokens=max_tokens, target_language=target_language)
+        parsed_result = extract_translation_json(translation_result)
+        if parsed_result is None:
+            raise ValueError('无法解析译文JSON')
+        return parsed_result
+
+    def validate_and_repair(self, result: Dict[str, Any], title: str, description: str,
+                            content: str) -> Dict[str, Any]:
+        """
+        校验翻译结果，只对未通过校验的字段或语言重新翻译
+
+        整体失败或无法解析的结果会重新翻译整种语言；部分字段未通过时只重新翻译这些字段。
+        重试次数用完后仍未通过的字段记录在 validation_errors 中，无法解析的结果标记为失败。
+
+        Args:
+            result: translate_content 返回的翻译结果字典
+            title: 原文标题
+            description: 原文描述
+            content: 原文正文
+
+        Returns:
+            校验（及修复）后的翻译结果字典
+        """
+        news_id = result['news_id']
+        target_language = result['target_language']
+        language_config = TARGET_LANGUAGES[target_language]
+        source = {'title': title, 'description': description, 'content': content}
+        retries_left = Config.VALIDATION_MAX_RETRIES
+        failures = {}
+
+        while True:
+            if result['status'] == 'error':
+                if retries_left <= 0:
+                    return result
+                retries_left -= 1
+                logger.warning(f"重新翻译 - 新闻ID: {news_id}, 目标语言: {target_language}, 原因: {result.get('error')}")
+                result = self.translate_content(news_id, title, description, content, target_language)
+                continue
+
+            if result['status'] == 'success_raw':
+                translated = {}
+            else:
+                translated = {field: result.get(f'translated_{field}', '') for field in TRANSLATION_FIELDS}
+            with profiling.span('validate'):
+                failures = validate_translation(translated, source, language_config)
+            if not failures or retries_left <= 0:
+                break
+            retries_left -= 1
+            logger.warning(f"译文校验未通过 - 新闻ID: {news_id}, 目标语言: {target_language}, 字段: {failures}")
+
+            if len(failures) == len(TRANSLATION_FIELDS):
+                result = self.translate_content(news_id, title, description, content, target_language)
+                continue
+
+            try:
+                repaired = self.retranslate_fields(target_language, {field: source[field] for field in failures})
+            except Exception as e:
+                logger.error(f"字段重新翻译失败 - 新闻ID: {news_id}, 目标语言: {target_language}, 错误: {str(e)}")
+                break
+            translated.update({field: repaired.get(field, '') for field in failures})
+            result = self._build_result(news_id, target_language, translated, title, description, content)
+
+        if result['status'] == 'success_raw':
+            return {
+                'news_id': news_id,
+                'target_language': target_language,
+                'language_name': language_config['name'],
+                'language_code': language_config['code'],
+                'error': '译文无法解析',
+                'raw_translation': result.get('raw_translation', ''),
+                'timestamp': datetime.now().isoformat(),
+                'status': 'error'
+            }
+        if failures:
+            result['validation_errors'] = failures
+        return result
+
+    def translate_split(self, news_id: str, title: str, description: str, content: str,
+                        target_languages: List[str],
+                        on_headline: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        分离模式翻译：标题/描述走快速通道先返回，正文走常规通道
+
+        所有语言的标题请求先于正文请求提交，标题完成后立即回调 on_headline，
+        正文完成后用快速通道的标题/描述覆盖正文结果中的对应字段。
+
+        Args:
+            news_id: 新闻ID
+            title: 标题
+            description: 描述
+            content: 正文
+            target_languages: 目标语言代码列表
+            on_headline: 标题结果回调（可选），每种语言调用一次
+
+        Returns:
+            {目标语言代码: 翻译结果字典}
+        """
+        headline_futures = {
+            lang: profiling.submit(self.headline_executor, self.translate_headline, news_id, title, description, lang)
+            for lang in target_languages
+        }
+        body_futures = {
+            lang: profiling.submit(self.body_executor, self.translate_content, news_id, title, description, content, lang)
+            for lang in target_languages
+        }
+
+        headlines = {}
+        for future in as_completed(headline_futures.values()):
+            headline = future.result()
+            headlines[headline['target_language']] = headline
+            if on_headline:
+                try:
+                    on_headline(headline)
+                except Exception as e:
+                    logger.error(f"标题回调失败 - 新闻ID: {news_id}, 错误: {str(e)}")
+
+        results = {}
+        for lang, future in body_futures.items():
+            result = future.result()
+            headline = headlines[lang]
+            if result['status'] == 'success' and headline['status'] == 'success':
+                result['translated_title'] = headline['translated_title']
+                result['translated_description'] = headline['translated_description']
+            results[lang] = result
+        return results
+
+    def translate_derived(self, news_id: str, title: str, description: str, content: str, target_language: str,
+                          parent_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        基于另一种语言的译文生成目标语言译文
+
+        adapt 模式用较短的改写提示词处理父语言译文（如台湾繁体→香港繁体）；
+        pivot 模式仍从原文翻译，但附带父语言译文作为专有名词参考。
+        父语言失败或结果无法解析时退回从原文完整翻译。
+
+        Args:
+            news_id: 新闻ID
+            title: 原文标题
+            description: 原文描述
+            content: 原文正文
+            target_language: 目标语言代码
+            parent_result: 父语言的翻译结果字典
+
+        Returns:
+            翻译结果字典
+        """
+        language_config = TARGET_LANGUAGES[target_language]
+        derive = language_config['derive_from']
+        if parent_result.get('status') != 'success':
+            return self.translate_content(news_id, title, description, content, target_language)
+
+        parent_fields = {field: parent_result.get(f'translated_{field}', '') for field in TRANSLATION_FIELDS}
+        with profiling.span('prompt'):
+            if derive['mode'] == 'adapt':
+                prompt = derive['prompt_template'].format(**parent_fields)
+            else:
+                prompt = language_config['prompt_template'].format(
+                    title=title,
+                    description=description,
+                    content=content
+                ) + LanguageConfig.build_pivot_reference(parent_fields, parent_result['language_name'])
+
+        try:
+            translation_result = self._complete(prompt, target_language=target_language)
+            with profiling.span('json'):
+                parsed_result = extract_translation_json(translation_result)
+        except Exception as e:
+            logger.error(f"派生翻译失败 - 新闻ID: {news_id}, 目标语言: {target_language}, 错误: {str(e)}")
+            parsed_result = None
+        if parsed_result is None:
+            return self.translate_content(news_id, title, description, content, target_language)
+
+        result = self._build_result(news_id, target_language, parsed_result, title, description, content)
+        result['derived_from'] = derive['language']
+        return result
+
+    def translate_graph(self, news_id: str, title: str, description: str, content: str,
+                        target_languages: List[str], validate: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        按语言依赖图翻译：没有依赖的语言并行翻译，父语言完成后立即开始其派生语言
+
+        父语言不在本次请求中，或配置存在循环依赖时，该语言直接从原文翻译。
+
+        Args:
+            news_id: 新闻ID
+            title: 标题
+            description: 描述
+            content: 正文
+            target_languages: 目标语言代码列表
+            validate: 是否校验并修复每种语言的译文，父语言修复后才开始派生语言
+
+        Returns:
+            {目标语言代码: 翻译结果字典}
+        """
+        parents = language_graph(target_languages)
+        children = defaultdict(list)
+        for lang, parent in parents.items():
+            if parent is not None:
+                children[parent].append(lang)
+
+        results = {}
+        futures = {}
+
+        def translate(lang: str) -> Dict[str, Any]:
+            if parents[lang] is None:
+                result = self.translate_content(news_id, title, description, content, lang)
+            else:
+                result = self.translate_derived(news_id, title, description, content, lang, results[parents[lang]])
+            if validate:
+                result = self.validate_and_repair(result, title, description, content)
+            return result
+
+        def submit(lang: str):
+            futures[profiling.submit(self.graph_executor, translate, lang)] = lang
+
+        for lang, parent in parents.items():
+            if parent is None:
+                submit(lang)
+
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                lang = futures.pop(future)
+                results[lang] = future.result()
+                for child in children[lang]:
+                    submit(child)
+        return results
@@ -0,0 +1,165 @@
+import json
+import re
+from typing import Dict, Any, Optional
+
+TRANSLATION_FIELDS = ('title', 'description', 'content')
+
+# 只在简体中文中出现的常用字（对应繁体字形不同），用于检查繁体译文中残留的简体字
+SIMPLIFIED_ONLY_CHARS = set(
+    '这们个为说时会来对国发经过还进动实现问题关东车长开门间让认请语读书学习电话网络软'
+    '业务产区统选举华报纸记员处总应该声营销办热爱边运输机场飞领导价钱银质两万与专义乐'
+    '亿众优传体侧备复头岁岛带师币广庆库张归录态恶戏战护无旧显构标样权极汉没济测浏湾灯'
+    '点状独环画确种称积竞笔类紧组织终结给继续维综罗职联听肃脑艺节获虽见规视览觉计讨训'
+    '议讲许论设访证评识译试询详误调谈谢贸费资购转轮较辆远连适递钟铁锁闻阅队阳际陆险随'
+    '难页项须顾预风馆马驾验鱼鸟黄齐龙'
+)
+
+FENCED_JSON_PATTERN = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+# 原文过短时长度比例波动太大，不做检查
+MIN_LENGTH_FOR_RATIO = 20
+
+
+def extract_translation_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    从模型返回文本中提取JSON翻译结果
+
+    依次尝试 ```json 代码块、普通代码块和文本中的第一个JSON对象。
+
+    Args:
+        text: 模型返回文本
+
+    Returns:
+        解析后的字典，无法解析时返回 None
+    """
+    if not text:
+        return None
+
+    for match in FENCED_JSON_PATTERN.finditer(text):
+        try:
+            parsed = json.loads(match.group(1))
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            continue
+
+    decoder = json.JSONDecoder()
+    start = text.find('{')
+    while start != -1:
+        try:
+            parsed, _ = decoder.raw_decode(text, start)
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+        start = text.find('{', start + 1)
+    return None
+
+
+def _char_stats(text: str) -> Dict[str, int]:
+    """统计各类文字的字符数"""
+    stats = {'letters': 0, 'cjk': 0, 'kana': 0, 'latin': 0, 'deva': 0, 'simplified': 0}
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        stats['letters'] += 1
+        code = ord(ch)
+        if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF:
+            stats['cjk'] += 1
+            if ch in SIMPLIFIED_ONLY_CHARS:
+                stats['simplified'] += 1
+        elif 0x3040 <= code <= 0x30FF:
+            stats['kana'] += 1
+        elif 0x0900 <= code <= 0x097F:
+            stats['deva'] += 1
+        elif code < 0x0250 or 0x1E00 <= code <= 0x1EFF:
+            # 基本拉丁及扩展字母，包含越南语带声调字母
+            stats['latin'] += 1
+    return stats
+
+
+# 各非拉丁文字目标语言：(统计项, 失败原因)
+NATIVE_SCRIPTS = {
+    'hant': (('cjk',), '译文不是中文'),
+    'ja': (('cjk', 'kana'), '译文不是日语'),
+    'deva': (('deva',), '译文不是天城文')
+}
+
+
+def _check_script(text: str, script: str, source_text: str = '') -> Optional[str]:
+    """
+    检查译文文字是否符合目标语言，返回失败原因
+
+    品牌名、人名、缩写等在译文中常保留拉丁字母（如 OpenAI發佈GPT-5），
+    非拉丁文字语言只在非拉丁字母中计算目标文字的比例；译文全是拉丁字母时与原文比较判断是否未翻译。
+    拉丁字母语言同样允许保留原文中的少量非拉丁文字（如括号中的原名）。
+    """
+    stats = _char_stats(text)
+    letters = stats['letters']
+    if letters == 0:
+        return None
+    source_stats = _char_stats(source_text)
+    non_latin = letters - stats['latin']
+    source_non_latin = source_stats['letters'] - source_stats['latin']
+
+    if script in NATIVE_SCRIPTS:
+        keys, reason = NATIVE_SCRIPTS[script]
+        if non_latin == 0:
+            # 原文有需要翻译的非拉丁文字，或原文是较长的拉丁字母文本，译文却全是拉丁字母
+            if source_non_latin > 0 or source_stats['letters'] >= MIN_LENGTH_FOR_RATIO:
+                return reason
+            return None
+        if sum(stats[key] for key in keys) / non_latin < 0.5:
+            return reason
+
+    if script == 'hant':
+        if stats['simplified'] > stats['cjk'] * 0.01:
+            return f"残留简体字 {stats['simplified']} 个"
+    elif script == 'ja':
+        if stats['cjk'] >= MIN_LENGTH_FOR_RATIO and stats['kana'] == 0:
+            return '译文缺少假名，疑似未翻译'
+    elif script == 'latin':
+        if stats['latin'] / letters < 0.5:
+            return '译文不是拉丁字母语言'
+        # 残留的非拉丁文字超过原文非拉丁文字的一半时视为未翻译
+        if source_non_latin and non_latin / source_non_latin > 0.5:
+            return '译文残留未翻译的原文'
+    return None
+
+
+def validate_translation(translated: Dict[str, Any], source: Dict[str, str],
+                         language_config: Dict[str, Any]) -> Dict[str, str]:
+    """
+    校验单种语言的翻译结果
+
+    Args:
+        translated: 译文字段，如 {'title': '...', 'description': '...', 'content': '...'}
+        source: 原文字段
+        language_config: 目标语言配置（使用其中的 script 和 length_ratio）
+
+    Returns:
+        {字段名: 失败原因}，全部通过时为空字典
+    """
+    failures = {}
+    script = language_config.get('script')
+    min_ratio, max_ratio = language_config.get('length_ratio', (0, float('inf')))
+
+    for field in TRANSLATION_FIELDS:
+        source_text = str(source.get(field) or '').strip()
+        text = translated.get(field)
+        if not isinstance(text, str) or not text.strip():
+            if source_text:
+                failures[field] = '译文为空'
+            continue
+        text = text.strip()
+
+        reason = _check_script(text, script, source_text) if script else None
+        if reason:
+            failures[field] = reason
+            continue
+
+        if len(source_text) >= MIN_LENGTH_FOR_RATIO:
+            ratio = len(text) / len(source_text)
+            if ratio < min_ratio or ratio > max_ratio:
+                failures[field] = f'译文长度比例异常 ({ratio:.2f})'
+    return failures
@@ -0,0 +1,200 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Iterable, Optional
+
+from lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """不跟随重定向，避免回调地址通过重定向指向内网"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class WebhookDispatcher:
+    """回调推送类：校验回调地址、签名、重试，并限制同时待推送的回调数量"""
+
+    # 这些状态码说明请求本身有问题，重试也不会成功（不跟随重定向，3xx 同样视为失败）
+    NON_RETRYABLE_STATUS = {301, 302, 303, 307, 308, 400, 401, 403, 404, 405, 410, 413, 422}
+
+    def __init__(self, secret: Optional[str] = None, max_workers: int = 4, max_pending: int = 100,
+                 max_retries: int = 5, retry_backoff: float = 1.0, timeout: float = 10.0,
+                 allowed_hosts: Iterable[str] = ()):
+        self.secret = secret
+        # 允许的回调主机，以 . 开头的条目匹配其所有子域名；为空时只允许解析到公网地址的主机
+        self.allowed_hosts = {host.strip().lower() for host in allowed_hosts if host.strip()}
+        self._opener = urllib.request.build_opener(_NoRedirect)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self._executor = Lazy(lambda: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='webhook'))
+        # 待推送数量达到上限时，提交方阻塞等待，避免回调积压占满内存
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        return self._executor.get()
+
+    def check_url(self, url: str) -> Optional[str]:
+        """
+        校验回调地址，防止通过回调请求访问内网服务
+
+        配置了允许的主机时，只接受列出的主机（可以是内网主机）；否则只接受所有解析地址都是公网地址的主机。
+
+        Returns:
+            不允许时返回原因，允许时返回 None
+        """
+        try:
+            parsed = urllib.parse.urlsplit(str(url))
+            host = parsed.hostname
+            port = parsed.port
+        except ValueError:
+            return 'callback_url 格式不正确'
+        if parsed.scheme not in ('http', 'https') or not host:
+            return 'callback_url 必须是 http(s) 地址'
+
+        host = host.lower()
+        if self.allowed_hosts:
+            if host in self.allowed_hosts or any(
+                    entry.startswith('.') and host.endswith(entry) for entry in self.allowed_hosts):
+                return None
+            return f'callback_url 的主机不在允许列表中: {host}'
+
+        try:
+            addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+        except OSError:
+            return f'callback_url 的主机无法解析: {host}'
+        for address in addresses:
+            if not ipaddress.ip_address(address.split('%')[0]).is_global:
+                return f'callback_url 不能指向内网或保留地址: {host}'
+        return None
+
+    def sign(self, timestamp: str, body: bytes) -> str:
+        """
+        计算回调签名
+
+        签名内容为 "{timestamp}.{body}"，使用 HMAC-SHA256，接收方用相同密钥校验即可。
+
+        Args:
+            timestamp: 请求头 X-Webhook-Timestamp 的值
+            body: 请求体
+
+        Returns:
+            十六进制签名
+        """
+        message = timestamp.encode('utf-8') + b'.' + body
+        return hmac.new(self.secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+    def deliver(self, url: str, payload: Dict[str, Any], after: Optional[Future] = None) -> Future:
+        """
+        异步推送回调
+
+        Args:
+            url: 回调地址
+            payload: 回调内容
+            after: 前一个回调的 Future（可选），该回调推送结束（成功或放弃重试）后才开始推送本回调
+
+        Returns:
+            Future，结果为是否推送成功
+        """
+        self._pending.acquire()
+        future = Future()
+
+        def finish(inner: Future):
+            self._pending.release()
+            if inner.exception() is not None:
+                future.set_exception(inner.exception())
+            else:
+                future.set_result(inner.result())
+
+        def start(_=None):
+            try:
+                inner = self.executor.submit(self._deliver_with_retry, url, payload)
+            except Exception as e:
+                self._pending.release()
+                future.set_exception(e)
+                return
+            inner.add_done_callback(finish)
+
+        if after is None:
+            start()
+        else:
+            # 前一个回调完成时在其线程内提交，不占用线程等待
+            after.add_done_callback(start)
+        return future
+
+    def _deliver_with_retry(self, url: str, payload: Dict[str, Any]) -> bool:
+        """推送回调，失败时按指数退避重试"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        news_id = payload.get('news_id', '')
+        event = payload.get('event', '')
+
+        # 接受请求后主机的解析结果可能已变化，推送前重新校验
+        reason = self.check_url(url)
+        if reason is not None:
+            logger.error(f"回调地址不允许 - 新闻ID: {news_id}, 事件: {event}, 原因: {reason}")
+            return False
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                status_code = self._post(url, body, attempt)
+                if 200 <= status_code < 300:
+                    return True
+                if status_code in self.NON_RETRYABLE_STATUS:
+                    logger.error(f"回调被拒绝 - 新闻ID: {news_id}, 事件: {event}, 状态码: {status_code}")
+                    return False
+                logger.warning(f"回调失败 - 新闻ID: {news_id}, 事件: {event}, 第{attempt}次, 状态码: {status_code}")
+            except Exception as e:
+                logger.warning(f"回调失败 - 新闻ID: {news_id}, 事件: {event}, 第{attempt}次, 错误: {str(e)}")
+
+            if attempt < self.max_retries:
+                time.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+
+        logger.error(f"回调最终失败 - 新闻ID: {news_id}, 事件: {event}, 地址: {url}")
+        return False
+
+    def _post(self, url: str, body: bytes, attempt: int) -> int:
+        """发送一次回调请求，返回HTTP状态码"""
+        timestamp = str(int(time.time()))
+        headers = {
+            'Content-Type': 'application/json; charset=utf-8',
+            'X-Webhook-Timestamp': timestamp,
+            'X-Webhook-Attempt': str(attempt)
+        }
+        if self.secret:
+            headers['X-Webhook-Signature'] = f'sha256={self.sign(timestamp, body)}'
+
+        req = urllib.request.Request(url, data=body, headers=headers, method='POST')
+        try:
+            with self._opener.open(req, timeout=self.timeout) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class WebhookSequence:
+    """同一任务的回调按提交顺序逐个推送，重试中的回调不会被后面的回调超过"""
+
+    def __init__(self, dispatcher: WebhookDispatcher, url: str):
+        self.dispatcher = dispatcher
+        self.url = url
+        self._last = None
+        self._lock = threading.Lock()
+
+    def deliver(self, payload: Dict[str, Any]) -> Future:
+        with self._lock:
+            self._last = self.dispatcher.deliver(self.url, payload, after=self._last)
+            return self._last
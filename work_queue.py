@@ -0,0 +1,346 @@
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Optional
+
+from lazy import reset_after_fork
+
+
+class Task:
+    """队列任务"""
+
+    def __init__(self, task_id: str, job_id: str, payload: Dict[str, Any], attempts: int, reserved_by: str,
+                 depends_on: Optional[str] = None):
+        self.task_id = task_id
+        self.job_id = job_id
+        self.payload = payload
+        self.attempts = attempts
+        self.reserved_by = reserved_by
+        self.depends_on = depends_on
+
+
+class WorkQueue(abc.ABC):
+    """
+    持久化任务队列接口
+
+    任务被领取后在可见性超时内对其他工作进程不可见；工作进程处理成功后 ack，
+    失败后 nack，超过最大尝试次数（包括工作进程崩溃导致超时）的任务进入死信。
+    ack/nack/extend 只对本次领取有效：任务超时后被重新领取，原领取者的确认不再生效。
+    """
+
+    @abc.abstractmethod
+    def enqueue(self, job_id: str, payload: Dict[str, Any], priority: int = 0, depends_on: str = None) -> str:
+        """提交任务，返回任务ID。指定 depends_on 时，该任务结束（完成或死信）后才能被领取"""
+
+    def enqueue_graph(self, job_id: str, payloads: Dict[str, Dict[str, Any]], parents: Dict[str, Optional[str]],
+                      priority: int = 0) -> Dict[str, str]:
+        """
+        按依赖关系提交一组任务
+
+        Args:
+            payloads: {键: 任务内容}
+            parents: {键: 依赖的键或 None}，按依赖顺序排列，被依赖的键在前
+
+        Returns:
+            {键: 任务ID}
+        """
+        task_ids = {}
+        for key, parent in parents.items():
+            task_ids[key] = self.enqueue(job_id, payloads[key], priority=priority,
+                                         depends_on=task_ids.get(parent) if parent is not None else None)
+        return task_ids
+
+    @abc.abstractmethod
+    def reserve(self, worker_id: str, visibility_timeout: float) -> Optional[Task]:
+        """领取一个任务，没有可领取的任务时返回 None"""
+
+    @abc.abstractmethod
+    def extend(self, task: Task, visibility_timeout: float) -> bool:
+        """延长已领取任务的可见性超时，任务已不属于本次领取时返回 False"""
+
+    @abc.abstractmethod
+    def ack(self, task: Task, result: Dict[str, Any], duration: float = None) -> bool:
+        """
+        确认任务完成并保存结果和处理耗时（秒），任务已不属于本次领取时不修改并返回 False
+        """
+
+    @abc.abstractmethod
+    def nack(self, task: Task, error: str, retry_delay: float = 0) -> bool:
+        """
+        任务失败，未超过最大尝试次数时重新入队，否则进入死信
+
+        任务已不属于本次领取时不修改并返回 False
+        """
+
+    @abc.abstractmethod
+    def cancel_job(self, job_id: str, error: str) -> int:
+        """
+        取消作业下仍在排队的任务（包括等待重试的任务），返回取消的任务数
+
+        已被领取的任务不受影响，由工作进程照常处理完成
+        """
+
+    @abc.abstractmethod
+    def get_job_results(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        查询一个作业下已结束的任务
+
+        Returns:
+            {任务ID: {'status': 'done' 或 'dead', 'result': 结果, 'error': 错误信息}}
+        """
+
+    @abc.abstractmethod
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """查询死信任务"""
+
+    @abc.abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数"""
+
+    @abc.abstractmethod
+    def load(self, priority: int = 0, window: float = 300) -> Dict[str, Any]:
+        """
+        队列负载，用于估算新任务的等待时间
+
+        Args:
+            priority: 新任务的优先级，只统计不低于该优先级的排队任务
+            window: 统计最近 window 秒内完成的任务耗时
+
+        Returns:
+            {'pending': 排队任务数, 'reserved': 处理中任务数, 'latency': 平均处理耗时（无记录时为 None）}
+        """
+
+    @abc.abstractmethod
+    def purge(self, older_than: float) -> int:
+        """删除结束超过 older_than 秒的已完成、死信和已取消任务，返回删除的任务数"""
+
+    def wait_for_job(self, job_id: str, task_ids: List[str], timeout: float, poll_interval: float = 0.2,
+                     on_finished: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                     ) -> Dict[str, Dict[str, Any]]:
+        """
+        等待作业下的任务结束
+
+        Args:
+            on_finished: 任务结束回调（可选），参数为 (任务ID, 结束信息)，每个任务按结束顺序调用一次
+
+        Returns:
+            已结束的任务，超时未结束的任务不在返回中
+        """
+        deadline = time.monotonic() + timeout
+        reported = set()
+        while True:
+            finished = self.get_job_results(job_id)
+            if on_finished:
+                for task_id in task_ids:
+                    if task_id in finished and task_id not in reported:
+                        reported.add(task_id)
+                        on_finished(task_id, finished[task_id])
+            if all(task_id in finished for task_id in task_ids) or time.monotonic() >= deadline:
+                return finished
+            time.sleep(poll_interval)
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """基于 SQLite 的本地持久化任务队列，适合单机多进程部署"""
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            job_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            visible_at REAL NOT NULL,
+            reserved_by TEXT,
+            depends_on TEXT,
+            result TEXT,
+            duration REAL,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks (status, visible_at, priority);
+        CREATE INDEX IF NOT EXISTS idx_tasks_job ON tasks (job_id);
+        CREATE INDEX IF NOT EXISTS idx_tasks_finished ON tasks (status, updated_at);
+    '''
+
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(self.SCHEMA)
+        # 旧版本创建的队列没有依赖字段
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(tasks)')}
+        if 'depends_on' not in columns:
+            conn.execute('ALTER TABLE tasks ADD COLUMN depends_on TEXT')
+        if 'duration' not in columns:
+            conn.execute('ALTER TABLE tasks ADD COLUMN duration REAL')
+        reset_after_fork(self, '_after_fork')
+
+    def _after_fork(self):
+        """SQLite 连接不能跨进程使用，子进程首次使用时重新连接"""
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用独立连接，事务由各方法显式控制"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any], priority: int = 0, depends_on: str = None) -> str:
+        task_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        self._conn().execute(
+            'INSERT INTO tasks (id, job_id, payload, priority, status, max_attempts, visible_at, depends_on, '
+            "created_at, updated_at) VALUES (?, ?, ?, ?, 'pending', ?, ?, ?, ?, ?)",
+            (task_id, job_id, json.dumps(payload, ensure_ascii=False), priority, self.max_attempts,
+             time.time(), depends_on, now, now)
+        )
+        return task_id
+
+    def reserve(self, worker_id: str, visibility_timeout: float) -> Optional[Task]:
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 领取后超时未确认且已用完尝试次数的任务（工作进程崩溃等）进入死信
+            conn.execute(
+                "UPDATE tasks SET status = 'dead', last_error = COALESCE(last_error, '处理超时'), updated_at = ? "
+                "WHERE status = 'reserved' AND visible_at <= ? AND attempts >= max_attempts",
+                (datetime.now().isoformat(), now)
+            )
+            # 依赖的任务仍未结束时跳过（依赖的任务已被清理视为已结束）
+            row = conn.execute(
+                "SELECT id, job_id, payload, attempts, depends_on FROM tasks "
+                "WHERE status IN ('pending', 'reserved') AND visible_at <= ? "
+                "AND (depends_on IS NULL OR NOT EXISTS (SELECT 1 FROM tasks AS parent "
+                "WHERE parent.id = tasks.depends_on AND parent.status IN ('pending', 'reserved'))) "
+                "ORDER BY priority DESC, created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'reserved', attempts = attempts + 1, visible_at = ?, "
+                "reserved_by = ?, updated_at = ? WHERE id = ?",
+                (now + visibility_timeout, worker_id, datetime.now().isoformat(), row['id'])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return Task(row['id'], row['job_id'], json.loads(row['payload']), row['attempts'] + 1, worker_id,
+                    row['depends_on'])
+
+    # 只修改仍属于本次领取的任务：状态为 reserved、领取者和尝试次数一致
+    OWNED = "id = ? AND status = 'reserved' AND reserved_by = ? AND attempts = ?"
+
+    def extend(self, task: Task, visibility_timeout: float) -> bool:
+        cursor = self._conn().execute(
+            f"UPDATE tasks SET visible_at = ?, updated_at = ? WHERE {self.OWNED}",
+            (time.time() + visibility_timeout, datetime.now().isoformat(), task.task_id, task.reserved_by,
+             task.attempts)
+        )
+        return cursor.rowcount == 1
+
+    def ack(self, task: Task, result: Dict[str, Any], duration: float = None) -> bool:
+        cursor = self._conn().execute(
+            f"UPDATE tasks SET status = 'done', result = ?, duration = ?, updated_at = ? WHERE {self.OWNED}",
+            (json.dumps(result, ensure_ascii=False), duration, datetime.now().isoformat(), task.task_id,
+             task.reserved_by, task.attempts)
+        )
+        return cursor.rowcount == 1
+
+    def nack(self, task: Task, error: str, retry_delay: float = 0) -> bool:
+        cursor = self._conn().execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END, "
+            f"visible_at = ?, last_error = ?, updated_at = ? WHERE {self.OWNED}",
+            (time.time() + retry_delay, error, datetime.now().isoformat(), task.task_id, task.reserved_by,
+             task.attempts)
+        )
+        return cursor.rowcount == 1
+
+    def cancel_job(self, job_id: str, error: str) -> int:
+        cursor = self._conn().execute(
+            "UPDATE tasks SET status = 'cancelled', last_error = ?, updated_at = ? "
+            "WHERE job_id = ? AND status = 'pending'",
+            (error, datetime.now().isoformat(), job_id)
+        )
+        return cursor.rowcount
+
+    def get_job_results(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT id, status, result, last_error FROM tasks WHERE job_id = ? AND status IN ('done', 'dead')",
+            (job_id,)
+        ).fetchall()
+        return {
+            row['id']: {
+                'status': row['status'],
+                'result': json.loads(row['result']) if row['result'] else None,
+                'error': row['last_error']
+            }
+            for row in rows
+        }
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT id, job_id, payload, attempts, last_error, updated_at FROM tasks "
+            "WHERE status = 'dead' ORDER BY updated_at DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [dict(row, payload=json.loads(row['payload'])) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._conn().execute('SELECT status, COUNT(*) AS count FROM tasks GROUP BY status').fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+    def load(self, priority: int = 0, window: float = 300) -> Dict[str, Any]:
+        conn = self._conn()
+        pending, reserved = conn.execute(
+            "SELECT COALESCE(SUM(status = 'pending' AND priority >= ?), 0), COALESCE(SUM(status = 'reserved'), 0) "
+            "FROM tasks WHERE status IN ('pending', 'reserved')",
+            (priority,)
+        ).fetchone()
+        cutoff = (datetime.now() - timedelta(seconds=window)).isoformat()
+        latency = conn.execute(
+            "SELECT AVG(duration) FROM tasks WHERE status = 'done' AND updated_at >= ? AND duration IS NOT NULL",
+            (cutoff,)
+        ).fetchone()[0]
+        return {'pending': pending, 'reserved': reserved, 'latency': latency}
+
+    def purge(self, older_than: float) -> int:
+        cutoff = (datetime.now() - timedelta(seconds=older_than)).isoformat()
+        cursor = self._conn().execute(
+            "DELETE FROM tasks WHERE status IN ('done', 'dead', 'cancelled') AND updated_at < ?",
+            (cutoff,)
+        )
+        return cursor.rowcount
+
+
+def create_work_queue(url: str, max_attempts: int = 3) -> WorkQueue:
+    """
+    按地址创建任务队列
+
+    目前支持 sqlite:///相对路径 和 sqlite:////绝对路径，其他实现继承 WorkQueue 后在这里注册即可。
+    """
+    if url.startswith('sqlite:///'):
+        return SQLiteWorkQueue(url[len('sqlite:///'):], max_attempts=max_attempts)
+    raise ValueError(f"不支持的任务队列地址: {url}")
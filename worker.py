@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译工作进程：从任务队列领取单语言翻译任务并写回结果
+
+API 进程在 WORK_QUEUE_ENABLED=True 时只负责入队和汇总，翻译由工作进程完成，
+两类进程可以分别扩容。
+
+用法：
+    python worker.py                 # 启动工作进程
+    python worker.py --dead-letters  # 查看死信任务
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Dict, Any
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config
+from store import TranslationStore
+from translation_service import TranslationService
+from work_queue import create_work_queue, WorkQueue, Task
+
+logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+logger = logging.getLogger(__name__)
+
+
+class TranslationWorker:
+    """翻译工作进程类，每个线程独立领取任务"""
+
+    def __init__(self, queue: WorkQueue, service: TranslationService, store: TranslationStore = None,
+                 threads: int = 4, visibility_timeout: float = 300, poll_interval: float = 1.0,
+                 retry_delay: float = 5.0, retention: float = 0, purge_interval: float = 3600):
+        self.queue = queue
+        self.service = service
+        self.store = store
+        self.threads = threads
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stopping = threading.Event()
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+
+    def process(self, task: Task) -> Dict[str, Any]:
+        """
+        翻译单个任务，失败时抛出异常
+
+        标题任务（kind 为 headline）只翻译标题和描述，不校验也不保存；依赖父语言任务时基于父语言译文派生；
+        store 为 False 的任务（分离模式的正文）由 API 进程合并标题后保存。
+        """
+        payload = task.payload
+        if payload.get('kind') == 'headline':
+            result = self.service.translate_headline(
+                news_id=payload['news_id'],
+                title=payload['title'],
+                description=payload['description'],
+                target_language=payload['target_language']
+            )
+            if result['status'] == 'error':
+                raise RuntimeError(result.get('error', '未知错误'))
+            return result
+        if task.depends_on:
+            parent = self.queue.get_job_results(task.job_id).get(task.depends_on)
+            # 父语言任务失败或已被清理时退回从原文翻译
+            parent_result = parent['result'] if parent is not None and parent['status'] == 'done' else {}
+            result = self.service.translate_derived(
+                news_id=payload['news_id'],
+                title=payload['title'],
+                description=payload['description'],
+                content=payload['content'],
+                target_language=payload['target_language'],
+                parent_result=parent_result
+            )
+        else:
+            result = self.service.translate_content(
+                news_id=payload['news_id'],
+                title=payload['title'],
+                description=payload['description'],
+                content=payload['content'],
+                target_language=payload['target_language']
+            )
+        if Config.VALIDATION_ENABLED:
+            result = self.service.validate_and_repair(result, payload['title'], payload['description'],
+                                                      payload['content'])
+        if result['status'] == 'error':
+            raise RuntimeError(result.get('error', '未知错误'))
+        if self.store is not None and payload.get('store', True):
+            self.store.record(result, Config.OPENAI_MODEL)
+        return result
+
+    def _run_thread(self):
+        while not self._stopping.is_set():
+            try:
+                task = self.queue.reserve(self.worker_id, self.visibility_timeout)
+            except Exception as e:
+                logger.error(f"领取任务失败: {str(e)}")
+                self._stopping.wait(self.poll_interval)
+                continue
+            if task is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+
+            with self._in_flight_lock:
+                self._in_flight.add(task)
+            try:
+                started = time.perf_counter()
+                result = self.process(task)
+                if not self.queue.ack(task, result, duration=time.perf_counter() - started):
+                    logger.warning(f"任务已超时被重新领取，结果未写回 - 任务ID: {task.task_id}, 第{task.attempts}次")
+            except Exception as e:
+                logger.error(f"任务失败 - 任务ID: {task.task_id}, 第{task.attempts}次, 错误: {str(e)}")
+                if not self.queue.nack(task, str(e), retry_delay=self.retry_delay * task.attempts):
+                    logger.warning(f"任务已超时被重新领取，失败未记录 - 任务ID: {task.task_id}, 第{task.attempts}次")
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight.discard(task)
+
+    def _heartbeat(self):
+        """定期延长处理中任务的可见性超时，避免长正文被其他进程重复领取；按保留时间清理已结束的任务"""
+        last_purge = 0.0
+        while not self._stopping.wait(self.visibility_timeout / 3):
+            with self._in_flight_lock:
+                tasks = list(self._in_flight)
+            for task in tasks:
+                try:
+                    if not self.queue.extend(task, self.visibility_timeout):
+                        logger.warning(f"任务已超时被重新领取 - 任务ID: {task.task_id}, 第{task.attempts}次")
+                except Exception as e:
+                    logger.error(f"延长任务超时失败 - 任务ID: {task.task_id}, 错误: {str(e)}")
+
+            if self.retention > 0 and time.monotonic() - last_purge >= self.purge_interval:
+                last_purge = time.monotonic()
+                try:
+                    purged = self.queue.purge(self.retention)
+                    if purged:
+                        logger.info(f"清理已结束的任务 {purged} 个")
+                except Exception as e:
+                    logger.error(f"清理任务失败: {str(e)}")
+
+    def run(self):
+        logger.info(f"工作进程 {self.worker_id} 启动，线程数: {self.threads}")
+        threads = [threading.Thread(target=self._run_thread, name=f'worker_{i}') for i in range(self.threads)]
+        threads.append(threading.Thread(target=self._heartbeat, name='worker-heartbeat', daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads[:-1]:
+            thread.join()
+        if self.store is not None:
+            self.store.flush()
+        logger.info(f"工作进程 {self.worker_id} 已退出")
+
+    def stop(self, *_):
+        """处理完当前任务后退出"""
+        logger.info("收到退出信号，处理完当前任务后退出")
+        self._stopping.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='翻译工作进程')
+    parser.add_argument('--threads', type=int, default=Config.WORKER_THREADS, help='并发线程数')
+    parser.add_argument('--dead-letters', action='store_true', help='查看死信任务后退出')
+    args = parser.parse_args()
+
+    queue = create_work_queue(Config.WORK_QUEUE_URL, max_attempts=Config.WORK_QUEUE_MAX_ATTEMPTS)
+    if args.dead_letters:
+        for item in queue.dead_letters():
+            print(json.dumps(item, ensure_ascii=False))
+        return 0
+
+    store = TranslationStore(
+        Config.STORE_PATH,
+        batch_size=Config.STORE_BATCH_SIZE,
+        flush_interval=Config.STORE_FLUSH_INTERVAL
+    ) if Config.STORE_ENABLED else None
+    worker = TranslationWorker(
+        queue,
+        TranslationService(),
+        store=store,
+        threads=args.threads,
+        visibility_timeout=Config.WORK_QUEUE_VISIBILITY_TIMEOUT,
+        poll_interval=Config.WORK_QUEUE_POLL_INTERVAL,
+        retry_delay=Config.WORK_QUEUE_RETRY_DELAY,
+        retention=Config.WORK_QUEUE_RETENTION
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())